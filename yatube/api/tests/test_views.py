@@ -0,0 +1,96 @@
+import json
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.paginators import encode_cursor
+from posts.models import Group, Post, User
+
+
+class ApiViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {i}',
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_json(self, url, **params):
+        response = self.guest_client.get(url, params)
+        content = b''.join(response.streaming_content) if (
+            response.streaming) else response.content
+        return response, json.loads(content)
+
+    def test_feeds_page_with_cursor(self):
+        """Ленты отдаются страницами по курсору next"""
+        response, data = self.get_json(reverse('api:index'), limit=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in data['results']],
+            [post.pk for post in self.posts[::-1][:3]],
+        )
+        _, data = self.get_json(
+            reverse('api:index'), limit=3, after=data['next'])
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNone(data['next'])
+
+    def test_broken_cursor(self):
+        """Некорректный курсор отдаёт 400, а не ошибку сервера"""
+        cursors = ['broken', encode_cursor([1, 1]), encode_cursor([{}, 1]),
+                   encode_cursor(['2020-01-01T00:00:00', 10 ** 20])]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response, data = self.get_json(
+                    reverse('api:index'), after=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', data)
+
+    def test_group_and_profile_heads(self):
+        """Лента группы и профиля начинается с описания владельца"""
+        _, data = self.get_json(
+            reverse('api:group', kwargs={'slug': self.group.slug}))
+        self.assertEqual(data['group']['posts_count'], 2)
+        self.assertEqual(len(data['results']), 2)
+        _, data = self.get_json(
+            reverse('api:profile', kwargs={'username': self.user.username}))
+        self.assertEqual(data['author']['full_name'], 'Лев Толстой')
+        self.assertEqual(data['author']['posts_count'], 5)
+
+    def test_fields_selection(self):
+        """Параметр fields ограничивает набор полей"""
+        post = self.posts[1]
+        _, data = self.get_json(
+            reverse('api:post_detail', kwargs={'post_id': post.pk}),
+            fields='text,group',
+        )
+        self.assertEqual(data, {'text': post.text, 'group': 'test_slug'})
+        response, _ = self.get_json(reverse('api:index'), fields='password')
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_objects(self):
+        """Несуществующие объекты отдают 404"""
+        urls = (
+            reverse('api:group', kwargs={'slug': 'missing'}),
+            reverse('api:profile', kwargs={'username': 'missing'}),
+            reverse('api:post_detail', kwargs={'post_id': 10 ** 6}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response, data = self.get_json(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('error', data)
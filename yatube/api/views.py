@@ -0,0 +1,143 @@
+import json
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from yatube.settings import API_MAX_LIMIT, COUNT_POSTS
+
+from core.paginators import KeysetPaginator, encode_cursor
+from posts.models import Group, Post, User
+
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+CONTENT_TYPE = 'application/json; charset=utf-8'
+
+encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+
+def json_response(data, status=200):
+    return HttpResponse(encode(data), content_type=CONTENT_TYPE,
+                        status=status)
+
+
+def error(message, status=400):
+    return json_response({'error': message}, status=status)
+
+
+def selected_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(FIELDS)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise ValueError('Неизвестные поля: ' + ', '.join(sorted(unknown)))
+    return fields
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', COUNT_POSTS))
+    except ValueError:
+        raise ValueError('limit должен быть числом')
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def serialize(row, fields):
+    # .values() отдаёт поля по именам запроса, наружу — короткие имена.
+    item = {name: row[FIELDS[name]] for name in fields}
+    if 'pub_date' in item:
+        item['pub_date'] = item['pub_date'].isoformat()
+    return encode(item)
+
+
+def stream_feed(rows, fields, limit, head):
+    yield encode(head)[:-1] + (',' if head else '') + '"results":['
+    last = None
+    has_next = False
+    for position, row in enumerate(rows):
+        if position == limit:
+            has_next = True
+            break
+        yield (',' if position else '') + serialize(row, fields)
+        last = row
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([last['pub_date'], last['id']])
+    yield '],"next":' + encode(next_cursor) + '}'
+
+
+def feed_response(request, posts, head=None):
+    """Отдаёт ленту потоком: строки .values() идут сразу в JSON."""
+    try:
+        fields = selected_fields(request)
+        limit = page_limit(request)
+    except ValueError as exc:
+        return error(str(exc))
+    paginator = KeysetPaginator(posts, limit)
+    after = request.GET.get('after')
+    if after:
+        try:
+            posts = paginator.seek(paginator.parse_cursor(after), 'lt')
+        except ValueError as exc:
+            return error(str(exc))
+    columns = {FIELDS[name] for name in fields} | {'id', 'pub_date'}
+    rows = (
+        posts.order_by('-pub_date', '-id')
+        .values(*columns)[:limit + 1]
+        .iterator(chunk_size=min(limit + 1, 2000))
+    )
+    return StreamingHttpResponse(
+        stream_feed(rows, fields, limit, head or {}),
+        content_type=CONTENT_TYPE,
+    )
+
+
+@require_GET
+def index(request):
+    return feed_response(request, Post.objects.all())
+
+
+@require_GET
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'id', 'title', 'slug', 'description', 'posts_count').first()
+    if group is None:
+        return error('Группа не найдена', status=404)
+    head = {'group': {key: value for key, value in group.items()
+                      if key != 'id'}}
+    return feed_response(
+        request, Post.objects.filter(group_id=group['id']), head)
+
+
+@require_GET
+def profile(request, username):
+    author = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name',
+        'stats__posts_count').first()
+    if author is None:
+        return error('Автор не найден', status=404)
+    head = {'author': {
+        'username': author['username'],
+        'full_name': f'{author["first_name"]} {author["last_name"]}'.strip(),
+        'posts_count': author['stats__posts_count'] or 0,
+    }}
+    return feed_response(
+        request, Post.objects.filter(author_id=author['id']), head)
+
+
+@require_GET
+def post_detail(request, post_id):
+    try:
+        fields = selected_fields(request)
+    except ValueError as exc:
+        return error(str(exc))
+    post = Post.objects.filter(pk=post_id).values(
+        *{FIELDS[name] for name in fields}).first()
+    if post is None:
+        return error('Пост не найден', status=404)
+    return HttpResponse(serialize(post, fields), content_type=CONTENT_TYPE)
@@ -0,0 +1,6 @@
+"""Воспроизводимые замеры производительности Yatube.
+
+Скрипты запускаются из каталога `yatube/`, например
+`python -m benchmarks.indexes`. Каждый замер создаёт отдельную
+временную базу и не трогает `db.sqlite3`.
+"""
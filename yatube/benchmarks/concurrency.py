@@ -0,0 +1,153 @@
+"""Пропускная способность SQLite при одновременных чтении и записи.
+
+    python -m benchmarks.concurrency --posts 100000 --readers 8 --writers 2
+
+Читатели открывают первую страницу главной ленты, писатели добавляют
+посты через ORM (сигналы счётчиков и поиска срабатывают как в
+post_create). Замер идёт дважды, каждый раз на свежей базе с тем же
+`--seed`: с PRAGMA по умолчанию (журнал отката) и с SQLITE_PRAGMAS из
+настроек.
+
+Читатели упираются в GIL не меньше, чем в SQLite, поэтому выигрыш WAL
+виден прежде всего на записи: писатель больше не ждёт, пока разойдутся
+читатели, а synchronous = NORMAL убирает fsync на каждый коммит.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from benchmarks.db import WORDS, populate, scratch_database, setup
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+}
+
+
+def reader(stop, stats):
+    from posts.models import Post
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            list(Post.objects.select_related('author', 'group')[:10])
+        except Exception:
+            stats['errors'] += 1
+            continue
+        stats['latencies'].append(time.perf_counter() - start)
+
+
+def writer(stop, stats, author_id, number):
+    from django.db import transaction
+
+    from posts.models import Post
+
+    sequence = 0
+    while not stop.is_set():
+        sequence += 1
+        start = time.perf_counter()
+        try:
+            with transaction.atomic():
+                Post.objects.create(
+                    author_id=author_id,
+                    text=f'{WORDS[sequence % len(WORDS)]} {number}-{sequence}',
+                )
+        except Exception:
+            stats['errors'] += 1
+            continue
+        stats['latencies'].append(time.perf_counter() - start)
+
+
+def worker(target, *args):
+    from django.db import connection
+
+    try:
+        target(*args)
+    finally:
+        connection.close()
+
+
+def summary(stats, seconds):
+    latencies = sorted(stats['latencies'])
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return {
+        'ops_per_s': round(len(latencies) / seconds, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3)
+        if latencies else 0,
+        'p95_ms': round(p95 * 1000, 3),
+        'errors': stats['errors'],
+    }
+
+
+def run_mode(pragmas, args):
+    from django.conf import settings
+
+    # PRAGMA применяются при открытии соединения, поэтому выставляются до
+    # создания базы.
+    settings.SQLITE_PRAGMAS = pragmas
+    with scratch_database('concurrency'):
+        author_id, _ = populate(args.posts, seed=args.seed)
+        return measure(author_id, args.readers, args.writers, args.seconds)
+
+
+def measure(author_id, readers, writers, seconds):
+    stop = threading.Event()
+    reads = {'latencies': [], 'errors': 0}
+    writes = {'latencies': [], 'errors': 0}
+    threads = [
+        threading.Thread(target=worker, args=(reader, stop, reads))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=worker, args=(
+            writer, stop, writes, author_id, number))
+        for number in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        'reads': summary(reads, seconds),
+        'writes': summary(writes, seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='куда сохранить результаты')
+    args = parser.parse_args()
+    setup()
+    from django.conf import settings
+
+    tuned = dict(settings.SQLITE_PRAGMAS)
+    settings.JOBS_IN_PROCESS = False
+    report = {
+        mode: run_mode(pragmas, args)
+        for mode, pragmas in (('default', DEFAULT_PRAGMAS),
+                              ('tuned', tuned))
+    }
+    print(f'{args.posts} постов, {args.readers} читателей, '
+          f'{args.writers} писателей, {args.seconds:g} с')
+    print(f'{"режим":<10}{"операция":<10}{"оп/с":>10}{"p50, мс":>10}'
+          f'{"p95, мс":>10}{"ошибок":>8}')
+    for mode, result in report.items():
+        for kind, values in result.items():
+            print(f'{mode:<10}{kind:<10}{values["ops_per_s"]:>10.1f}'
+                  f'{values["p50_ms"]:>10.3f}{values["p95_ms"]:>10.3f}'
+                  f'{values["errors"]:>8}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+
+WORDS = (
+    'лето море город утро книга письмо дорога ветер песня окно '
+    'друг поезд кофе снег река ночь свет дом сад мост'
+).split()
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
+
+
+@contextmanager
+def scratch_database(name='bench'):
+    """Создаёт и мигрирует временную файловую базу на время замера."""
+    from django.db import connection
+
+    directory = tempfile.mkdtemp(prefix='yatube-bench-')
+    connection.settings_dict['TEST']['NAME'] = os.path.join(
+        directory, f'{name}.sqlite3'
+    )
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def skewed_weights(count):
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def populate(posts, seed=0, batch_size=10000):
+    """Быстро наполняет базу: немного тяжёлых авторов и групп.
+
+    Возвращает id самых активных автора и группы.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from posts.models import Group
+
+    User = get_user_model()
+    rnd = random.Random(seed)
+    users = User.objects.bulk_create(
+        User(username=f'bench{i}', password='!')
+        for i in range(max(10, posts // 100))
+    )
+    groups = Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-{i}', description='-')
+        for i in range(max(5, posts // 1000))
+    )
+    # bulk_create в SQLite не возвращает pk, берём их из базы.
+    author_ids = list(
+        User.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    group_ids = list(
+        Group.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    assert len(author_ids) == len(users) and len(group_ids) == len(groups)
+    author_weights = skewed_weights(len(author_ids))
+    group_weights = skewed_weights(len(group_ids))
+    start = timezone.now() - timedelta(days=3 * 365)
+    span = 3 * 365 * 24 * 3600
+    adapt = connection.ops.adapt_datetimefield_value
+    sql = (
+        'INSERT INTO posts_post '
+        '(text, pub_date, author_id, group_id, version, image, thumbnails) '
+        "VALUES (%s, %s, %s, %s, 0, '', '')"
+    )
+    created = 0
+    while created < posts:
+        size = min(batch_size, posts - created)
+        authors = rnd.choices(author_ids, author_weights, k=size)
+        post_groups = rnd.choices(group_ids + [None],
+                                  group_weights + [1], k=size)
+        rows = [
+            (
+                ' '.join(rnd.choices(WORDS, k=12)),
+                adapt(start + timedelta(seconds=rnd.random() * span)),
+                author,
+                group,
+            )
+            for author, group in zip(authors, post_groups)
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        created += size
+    return author_ids[0], group_ids[0]
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
@@ -0,0 +1,108 @@
+"""Время запросов лент с составными индексами Post и без них.
+
+    python -m benchmarks.indexes --sizes 10000,100000,1000000
+
+Для каждого размера база наполняется детерминированно (`--seed`),
+затем запросы index, group_posts и profile замеряются без индексов
+из `Post.Meta.indexes` и с ними. Рядом печатается план запроса SQLite.
+
+ANALYZE намеренно не запускается: миграции его не делают, а со
+статистикой sqlite_stat1 на миллионе постов планировщик начинает ленту
+с полного обхода auth_user и сортирует все посты.
+"""
+import argparse
+import json
+
+from benchmarks.db import median_ms, populate, scratch_database, setup
+
+
+def scenarios(author_id, group_id, size):
+    from core.paginators import KeysetPaginator
+    from posts.models import Post
+
+    feed = Post.objects.select_related('author', 'group')
+    middle = feed.order_by('-pub_date', '-id')[size // 2]
+    return {
+        'index': feed[:10],
+        'index_deep_offset': feed[size // 2:size // 2 + 10],
+        'index_keyset': KeysetPaginator(feed, 10)
+        .seek([middle.pub_date, middle.pk], 'lt')
+        .order_by('-pub_date', '-id')[:10],
+        'group_posts': Post.objects.filter(
+            group_id=group_id).select_related('author')[:10],
+        'profile': Post.objects.filter(
+            author_id=author_id).select_related('group')[:10],
+    }
+
+
+def query_plan(connection, queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return '; '.join(row[-1] for row in cursor.fetchall())
+
+
+def measure(connection, queries, repeat):
+    results = {}
+    for name, queryset in queries.items():
+        results[name] = {
+            'ms': round(median_ms(lambda: list(queryset.all()), repeat), 3),
+            'plan': query_plan(connection, queryset),
+        }
+    return results
+
+
+def set_feed_indexes(connection, enabled):
+    from posts.models import Post
+
+    with connection.schema_editor() as editor:
+        for index in Post._meta.indexes:
+            if enabled:
+                editor.add_index(Post, index)
+            else:
+                editor.remove_index(Post, index)
+
+
+def run(size, seed, repeat):
+    with scratch_database(f'indexes-{size}') as connection:
+        author_id, group_id = populate(size, seed=seed)
+        queries = scenarios(author_id, group_id, size)
+        set_feed_indexes(connection, enabled=False)
+        without = measure(connection, queries, repeat)
+        set_feed_indexes(connection, enabled=True)
+        with_indexes = measure(connection, queries, repeat)
+    return {
+        name: {'without': without[name], 'with': with_indexes[name]}
+        for name in queries
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', help='куда сохранить результаты')
+    parser.add_argument('--plans', action='store_true',
+                        help='печатать планы запросов')
+    args = parser.parse_args()
+    setup()
+    report = {}
+    for size in [int(value) for value in args.sizes.split(',')]:
+        report[size] = run(size, args.seed, args.repeat)
+        print(f'\n{size} постов')
+        print(f'{"запрос":<20}{"без, мс":>12}{"с, мс":>12}{"ускорение":>12}')
+        for name, result in report[size].items():
+            before, after = result['without']['ms'], result['with']['ms']
+            speedup = before / after if after else float('inf')
+            print(f'{name:<20}{before:>12.3f}{after:>12.3f}{speedup:>11.1f}x')
+            if args.plans:
+                print(f'    без: {result["without"]["plan"]}')
+                print(f'    с:   {result["with"]["plan"]}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
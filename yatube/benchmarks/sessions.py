@@ -0,0 +1,108 @@
+"""SQL-запросы и время страниц вошедшего пользователя по режимам сессий.
+
+    python -m benchmarks.sessions --posts 10000 --repeat 50
+
+Режимы:
+
+- db — сессия в django_session, пользователь из auth_user, как было;
+- cached — сессия cached_db и пользователь из кэша (users.backends);
+- signed — сессия в подписанной cookie и пользователь из кэша.
+
+Пользователь входит по паролю, как в браузере. Первый запрос каждой
+страницы прогревает кэш и в замер не входит.
+"""
+import argparse
+import json
+
+from benchmarks.db import median_ms, populate, scratch_database, setup
+
+PASSWORD = 'bench-password'
+MODES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+    },
+    'signed': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+    },
+}
+
+
+def pages(author):
+    from django.urls import reverse
+
+    from posts.models import Post
+
+    post = Post.objects.filter(author=author).first()
+    return {
+        'index': reverse('posts:index'),
+        'profile': reverse('posts:profile', kwargs={'username': author}),
+        'post_detail': reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}),
+        'follow_index': reverse('posts:follow_index'),
+    }
+
+
+def run_mode(mode, args):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    for name, value in MODES[mode].items():
+        setattr(settings, name, value)
+    cache.clear()
+    with scratch_database(f'sessions-{mode}'):
+        author_id, _ = populate(args.posts, seed=args.seed)
+        author = get_user_model().objects.get(pk=author_id)
+        author.set_password(PASSWORD)
+        author.save()
+        client = Client()
+        client.login(username=author.username, password=PASSWORD)
+        results = {}
+        for name, url in pages(author).items():
+            client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            results[name] = {
+                'queries': len(queries),
+                'ms': round(median_ms(lambda: client.get(url),
+                                      args.repeat), 2),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--json', help='куда сохранить результаты')
+    args = parser.parse_args()
+    setup()
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.QUERY_BUDGETS = {}
+    report = {mode: run_mode(mode, args) for mode in args.modes.split(',')}
+    print(f'{"режим":<10}{"страница":<16}{"запросов":>10}{"мс":>10}')
+    for mode, results in report.items():
+        for name, result in results.items():
+            print(f'{mode:<10}{name:<16}{result["queries"]:>10}'
+                  f'{result["ms"]:>10.2f}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,15 @@
+"""Задержка, запросы и память каждой публичной страницы posts, users, about.
+
+    python -m benchmarks.views run --sizes 1000,10000,100000 --json now.json
+    python -m benchmarks.views compare baseline.json now.json
+
+`run` для каждого размера наполняет временную базу командой seed и
+прогоняет сценарии из `scenarios.py` тестовым клиентом: p50 и p95
+задержки, SQL-запросы на запрос и пик выделенной памяти (tracemalloc).
+`compare` (или `run --baseline`) отмечает регрессии против сохранённого
+прогона и завершается с кодом 1, если они есть.
+
+Записи выполняются на месте (WRITE_QUEUE выключен), чтобы их запросы
+попадали в счёт запроса. Фоновые задачи jobs только ставятся в очередь
+(JOBS_IN_PROCESS выключен), как и в запросе на боевом сервере.
+"""
@@ -0,0 +1,222 @@
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.db import scratch_database, setup
+from benchmarks.views import __doc__ as DESCRIPTION
+
+PASSWORD = 'bench-password'
+WARMUP = 2
+# Разница меньше этих порогов считается шумом, а не регрессией.
+NOISE_MS = 0.5
+NOISE_KB = 64
+FOLLOWED_AUTHORS = 20
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def prepare(size, seed):
+    """Наполняет базу и выбирает самых активных автора и группу."""
+    from django.core.management import call_command
+
+    from benchmarks.views.scenarios import Fixture
+    from posts import timeline
+    from posts.models import AuthorStats, Follow, Group, Post
+
+    call_command(
+        'seed', posts=size, users=max(10, size // 100),
+        groups=max(5, size // 1000), seed=seed, password=PASSWORD,
+        stdout=io.StringIO(),
+    )
+    ranking = AuthorStats.objects.select_related('author').order_by(
+        '-posts_count')
+    author = ranking[0].author
+    for stats in ranking[1:FOLLOWED_AUTHORS + 1]:
+        Follow.objects.create(user=author, author=stats.author)
+        timeline.backfill(author.pk, stats.author_id)
+    post = Post.objects.filter(author=author).order_by('-pub_date').first()
+    return author, Fixture(
+        username=author.username,
+        password=PASSWORD,
+        group=Group.objects.order_by('-posts_count').first().slug,
+        post_id=post.pk,
+        word=post.text.split()[0].strip('.,').lower(),
+    )
+
+
+def client_factory(kind, author):
+    from django.test import Client
+
+    def logged_in():
+        client = Client()
+        client.force_login(author)
+        return client
+
+    if kind == 'guest':
+        client = Client()
+        return lambda: client
+    if kind == 'author':
+        client = logged_in()
+        return lambda: client
+    if kind == 'fresh':
+        return Client
+    return logged_in
+
+
+def request(client, scenario, url, data):
+    response = getattr(client, scenario.method)(url, data)
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{scenario.name}: {url} ответил {response.status_code}')
+    return response
+
+
+def measure(scenario, fixture, author, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    new_client = client_factory(scenario.client, author)
+    url = scenario.url(fixture)
+    data = scenario.data(fixture) if scenario.data else {}
+    timings = []
+    for iteration in range(WARMUP + repeat):
+        client = new_client()
+        start = time.perf_counter()
+        request(client, scenario, url, data)
+        if iteration >= WARMUP:
+            timings.append((time.perf_counter() - start) * 1000)
+    # Запросы и память — отдельным прогоном: tracemalloc замедляет код.
+    client = new_client()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        request(client, scenario, url, data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'queries': len(queries),
+        'alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def run(args):
+    import django
+    from django.conf import settings
+
+    from benchmarks.views.scenarios import SCENARIOS
+
+    settings.DEBUG = False
+    settings.QUERY_BUDGETS = {}
+    settings.WRITE_QUEUE = False
+    settings.JOBS_IN_PROCESS = False
+    names = set(args.only.split(',')) if args.only else None
+    results = {}
+    for size in [int(value) for value in args.sizes.split(',')]:
+        with scratch_database(f'views-{size}'):
+            author, fixture = prepare(size, args.seed)
+            results[str(size)] = {
+                scenario.name: measure(scenario, fixture, author, args.repeat)
+                for scenario in SCENARIOS
+                if names is None or scenario.name in names
+            }
+        print_results(size, results[str(size)])
+    return {
+        'meta': {
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def print_results(size, results):
+    print(f'\n{size} постов')
+    print(f'{"сценарий":<24}{"p50, мс":>10}{"p95, мс":>10}'
+          f'{"запросов":>10}{"память, КиБ":>14}')
+    for name, result in results.items():
+        print(f'{name:<24}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}'
+              f'{result["queries"]:>10}{result["alloc_kb"]:>14.1f}')
+
+
+def regressions(baseline, current, threshold):
+    """Ухудшения против базового прогона: время и память — больше чем на
+    threshold (и больше шума), запросы — любое увеличение."""
+    found = []
+    for size, scenarios in current['results'].items():
+        for name, now in scenarios.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            for metric, noise in (('p50_ms', NOISE_MS), ('p95_ms', NOISE_MS),
+                                  ('alloc_kb', NOISE_KB)):
+                if (now[metric] > before[metric] * (1 + threshold)
+                        and now[metric] - before[metric] > noise):
+                    found.append((size, name, metric, before[metric],
+                                  now[metric]))
+            if now['queries'] > before['queries']:
+                found.append((size, name, 'queries', before['queries'],
+                              now['queries']))
+    return found
+
+
+def report_regressions(baseline, current, threshold):
+    found = regressions(baseline, current, threshold)
+    if not found:
+        print('\nРегрессий нет')
+        return 0
+    print(f'\nРегрессии (порог {threshold:.0%}):')
+    for size, name, metric, before, now in found:
+        print(f'  {size:>8} {name:<24}{metric:<10}{before:>10} → {now}')
+    return 1
+
+
+def load(path):
+    with open(path, encoding='utf-8') as source:
+        return json.load(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=DESCRIPTION.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='замерить страницы')
+    run_parser.add_argument('--sizes', default='1000,10000,100000')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--repeat', type=int, default=30)
+    run_parser.add_argument('--only', help='сценарии через запятую')
+    run_parser.add_argument('--json', help='куда сохранить результаты')
+    run_parser.add_argument('--baseline', help='сравнить с этим прогоном')
+    run_parser.add_argument('--threshold', type=float, default=0.2)
+    compare_parser = commands.add_parser(
+        'compare', help='сравнить два сохранённых прогона')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    if args.command == 'compare':
+        return report_regressions(
+            load(args.baseline), load(args.current), args.threshold)
+    setup()
+    report = run(args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+    if args.baseline:
+        return report_regressions(load(args.baseline), report, args.threshold)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+from collections import namedtuple
+
+from django.urls import reverse
+
+# client: guest — аноним, author — вошедший автор, fresh — новый
+# анонимный клиент на каждый повтор, fresh_author — новый вошедший.
+Scenario = namedtuple(
+    'Scenario', 'name method url client data', defaults=('guest', None))
+
+Fixture = namedtuple('Fixture', 'username password group post_id word')
+
+SCENARIOS = [
+    # posts
+    Scenario('index', 'get', lambda f: reverse('posts:index')),
+    Scenario('index_deep', 'get',
+             lambda f: reverse('posts:index') + '?page=50'),
+    Scenario('group_posts', 'get',
+             lambda f: reverse('posts:group', args=[f.group])),
+    Scenario('profile', 'get',
+             lambda f: reverse('posts:profile', args=[f.username])),
+    Scenario('post_detail', 'get',
+             lambda f: reverse('posts:post_detail', args=[f.post_id])),
+    Scenario('search', 'get',
+             lambda f: reverse('posts:search') + f'?q={f.word}'),
+    Scenario('follow_index', 'get',
+             lambda f: reverse('posts:follow_index'), 'author'),
+    Scenario('post_create_form', 'get',
+             lambda f: reverse('posts:post_create'), 'author'),
+    Scenario('post_create', 'post',
+             lambda f: reverse('posts:post_create'), 'author',
+             lambda f: {'text': f'Замер {f.word}'}),
+    Scenario('post_edit_form', 'get',
+             lambda f: reverse('posts:post_edit', args=[f.post_id]),
+             'author'),
+    # users
+    Scenario('login_form', 'get', lambda f: reverse('users:login')),
+    Scenario('login', 'post', lambda f: reverse('users:login'), 'fresh',
+             lambda f: {'username': f.username, 'password': f.password}),
+    Scenario('logout', 'get', lambda f: reverse('users:logout'),
+             'fresh_author'),
+    Scenario('signup_form', 'get', lambda f: reverse('users:signup')),
+    Scenario('password_change_form', 'get',
+             lambda f: reverse('users:password_change'), 'author'),
+    Scenario('password_reset_form', 'get',
+             lambda f: reverse('users:password_reset')),
+    # about
+    Scenario('about_author', 'get', lambda f: reverse('about:author')),
+    Scenario('about_tech', 'get', lambda f: reverse('about:tech')),
+]
@@ -0,0 +1,153 @@
+"""Нагрузочный тест записи: ошибки блокировки базы при параллельных постах.
+
+    python -m benchmarks.writes --threads 16 --rate 100 --seconds 10
+
+Потоки тестовым клиентом публикуют посты через post_create и правят
+свой пост через post_edit (доля правок — `--edits`) с заданной
+суммарной частотой. Каждый поток пишет от своего автора, поэтому
+авторов в базе (`--posts` / 100) должно быть не меньше потоков. Режимы:
+
+- direct — без очереди и повторов, как было раньше;
+- retry — без очереди, с повторами и паузами core.writes.with_retry;
+- queue — поток-писатель core.writes, записи группируются в транзакции.
+
+В отчёте — сколько записей прошло, сколько упало с «database is locked»
+и задержки ответа.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from benchmarks.db import WORDS, populate, scratch_database, setup
+
+MODES = {
+    'direct': {'WRITE_QUEUE': False, 'WRITE_RETRIES': 0},
+    'retry': {'WRITE_QUEUE': False},
+    'queue': {'WRITE_QUEUE': True},
+}
+
+
+def poster(client, post_id, edit_share, interval, stop, stats):
+    from django.db import OperationalError, connection
+    from django.urls import reverse
+
+    create_url = reverse('posts:post_create')
+    edit_url = reverse('posts:post_edit', kwargs={'post_id': post_id})
+    sequence = 0
+    next_at = time.perf_counter()
+    try:
+        while not stop.is_set():
+            next_at += interval
+            sequence += 1
+            text = f'{WORDS[sequence % len(WORDS)]} {post_id}-{sequence}'
+            # Правки по доле edit_share, равномерно по последовательности.
+            edit = int(sequence * edit_share) > int(
+                (sequence - 1) * edit_share)
+            start = time.perf_counter()
+            try:
+                client.post(edit_url if edit else create_url, {'text': text})
+            except OperationalError as exc:
+                key = 'locked' if 'locked' in str(exc) else 'errors'
+                stats[key] += 1
+            else:
+                stats['latencies'].append(time.perf_counter() - start)
+            time.sleep(max(0, next_at - time.perf_counter()))
+    finally:
+        connection.close()
+
+
+def clients(count):
+    """Клиенты авторов со своим постом для правок; вход — до замера."""
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from posts.models import Post
+
+    result = []
+    for author in get_user_model().objects.order_by('pk')[:count]:
+        client = Client()
+        client.force_login(author)
+        post = Post.objects.create(author=author, text='Пост для правок')
+        result.append((client, post.pk))
+    return result
+
+
+def run_mode(overrides, args):
+    from django.test.utils import override_settings
+
+    from core import writes
+
+    with override_settings(**overrides), scratch_database('writes'):
+        populate(args.posts, seed=args.seed)
+        # Соединение прежнего писателя смотрит в базу прошлого режима.
+        writes.write_queue = writes.WriteQueue()
+        stop = threading.Event()
+        stats = {'latencies': [], 'locked': 0, 'errors': 0}
+        interval = args.threads / args.rate
+        threads = [
+            threading.Thread(target=poster, args=(
+                client, post_id, args.edits, interval, stop, stats
+            ))
+            for client, post_id in clients(args.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    latencies = sorted(stats['latencies'])
+    return {
+        'writes_per_s': round(len(latencies) / args.seconds, 1),
+        'locked': stats['locked'],
+        'errors': stats['errors'],
+        'p50_ms': round(statistics.median(latencies) * 1000, 1)
+        if latencies else 0,
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1)
+        if latencies else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=100,
+                        help='целевое число записей в секунду на все потоки')
+    parser.add_argument('--edits', type=float, default=0.5,
+                        help='доля правок post_edit среди записей')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--json', help='куда сохранить результаты')
+    args = parser.parse_args()
+    setup()
+    import logging
+
+    from django.conf import settings
+
+    # Упавшие запросы считаются в отчёте, трейсбеки в консоли не нужны.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.QUERY_BUDGETS = {}
+    settings.JOBS_IN_PROCESS = False
+    report = {
+        mode: run_mode(MODES[mode], args) for mode in args.modes.split(',')
+    }
+    print(f'{args.threads} потоков, цель {args.rate:g} записей/с, '
+          f'{args.seconds:g} с')
+    print(f'{"режим":<10}{"записей/с":>10}{"locked":>8}{"других":>8}'
+          f'{"p50, мс":>10}{"p95, мс":>10}')
+    for mode, result in report.items():
+        print(f'{mode:<10}{result["writes_per_s"]:>10.1f}'
+              f'{result["locked"]:>8}{result["errors"]:>8}'
+              f'{result["p50_ms"]:>10.1f}{result["p95_ms"]:>10.1f}')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.routers import mark_synced
+
+
+def copy_database(alias):
+    """Снимок default через backup API SQLite, подменяемый атомарно.
+
+    Реплика остаётся в режиме журнала отката: после os.replace
+    чужие -wal и -shm файлы не должны достаться новой копии. Время начала
+    снимка запоминается: страницы, изменённые позже, читаются из default.
+    """
+    started = time.time()
+    source = connections['default']
+    source.ensure_connection()
+    target = connections[alias].settings_dict['NAME']
+    temporary = f'{target}.tmp'
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    with closing(sqlite3.connect(temporary)) as copy:
+        source.connection.backup(copy)
+        copy.execute('PRAGMA journal_mode = delete')
+    os.replace(temporary, target)
+    mark_synced(alias, started)
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу в реплики DATABASE_REPLICAS; '
+            'запускайте и после migrate')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every', type=float, default=0,
+            help='повторять каждые N секунд вместо одной копии')
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                copy_database(alias)
+                self.stdout.write(f'{alias}: скопирована')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
@@ -0,0 +1,86 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('yatube.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """execute_wrapper, считающий запросы и их суммарное время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    @property
+    def milliseconds(self):
+        return self.duration * 1000
+
+
+def check_budget(view_name, stats):
+    """Сверяет запрос с бюджетом view.
+
+    Бросает исключение (при QUERY_BUDGET_RAISE) только за лишние
+    запросы: их число от машины не зависит. Время SQL зависит от нагрузки
+    и прогрева кэшей, поэтому его превышение только пишется в лог.
+    """
+    budget = settings.QUERY_BUDGETS.get(view_name)
+    if budget is None:
+        return
+    if 'ms' in budget and stats.milliseconds > budget['ms']:
+        logger.warning(
+            '%s: превышен бюджет, %.1f мс SQL из %s',
+            view_name, stats.milliseconds, budget['ms'],
+        )
+    if stats.count <= budget['queries']:
+        return
+    message = (f'{view_name}: превышен бюджет, '
+               f'{stats.count} запросов из {budget["queries"]}')
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL каждого запроса и сверяет с QUERY_BUDGETS.
+
+    При QUERY_BUDGET_TIMING_HEADER число и время запросов уходят клиенту
+    в заголовке Server-Timing. Запросы, которые StreamingHttpResponse
+    делает уже после выхода из view, в счёт не попадают.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        logger.debug('%s: %d запросов, %.1f мс', view_name, stats.count,
+                     stats.milliseconds)
+        if settings.QUERY_BUDGET_TIMING_HEADER:
+            response['Server-Timing'] = (
+                f'db;desc="{stats.count} queries";'
+                f'dur={stats.milliseconds:.1f}'
+            )
+        check_budget(view_name, stats)
+        return response
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+
+from core.routers import PIN_COOKIE
+
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS', 'TRACE'}
+
+
+class ReplicaPinMiddleware:
+    """После изменяющего запроса читает за пользователя из default.
+
+    Ставит cookie на REPLICA_PIN_SECONDS — за это время реплики успевают
+    догнать основную базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                PIN_COOKIE, str(time.time()),
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
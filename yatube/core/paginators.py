@@ -0,0 +1,244 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator
+)
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    padded = token + '=' * (-len(token) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Некорректный курсор')
+    if not isinstance(values, list):
+        raise ValueError('Некорректный курсор')
+    return values
+
+
+def is_cursor_value(value):
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, int):
+        return -2 ** 63 <= value < 2 ** 63
+    return isinstance(value, str)
+
+
+class WindowPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    @property
+    def page_window(self):
+        """Номера страниц вокруг текущей вместо всего page_range."""
+        last = self.paginator.num_pages
+        if not self._has_next:
+            last = self.number
+        elif last <= self.number:
+            # Оценка числа объектов отстала, но следующая страница есть.
+            last = self.number + 1
+        return range(
+            max(1, self.number - self.paginator.window),
+            min(last, self.number + self.paginator.window) + 1
+        )
+
+
+class ApproximatePaginator(Paginator):
+    """Paginator с готовым или закэшированным числом объектов.
+
+    Число берётся из `count`, из кэша по `cache_key` (не старше
+    PAGINATOR_COUNT_TTL секунд) или, в крайнем случае, из COUNT(*).
+    Наличие следующей страницы определяется по лишней строке выборки,
+    поэтому неточная оценка не ломает навигацию.
+    """
+
+    def __init__(self, object_list, per_page, count=None, cache_key=None,
+                 window=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+        self.cache_key = cache_key
+        self.window = window or settings.PAGINATOR_WINDOW
+
+    @cached_property
+    def count(self):
+        if self._known_count is not None:
+            return self._known_count
+        if self.cache_key is None:
+            return super().count
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = super().count
+            cache.set(self.cache_key, count, settings.PAGINATOR_COUNT_TTL)
+        return count
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        # Оценка числа объектов может отставать на несколько страниц, но
+        # дальше окна за последней страницей OFFSET не имеет смысла: он
+        # прошёл бы всю выборку, а огромный ещё и переполнил бы INTEGER.
+        if number > self.num_pages + self.window:
+            raise EmptyPage('Страница далеко за последней')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов')
+        return WindowPage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page
+        )
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            pass
+        # За пределами ленты: последняя страница по оценке, без нового
+        # COUNT(*); если оценка завышена — первая.
+        try:
+            return self.page(self.num_pages)
+        except EmptyPage:
+            return self.page(1)
+
+
+class KeysetPage:
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<KeysetPage of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Постраничный вывод по курсору без COUNT(*) и OFFSET.
+
+    Объекты идут по убыванию ключей `keys`; последний ключ должен быть
+    уникальным, чтобы порядок был однозначным.
+    """
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.keys = tuple(keys)
+
+    def cursor_for(self, obj):
+        return encode_cursor([getattr(obj, key) for key in self.keys])
+
+    def parse_cursor(self, token):
+        values = decode_cursor(token)
+        if len(values) != len(self.keys):
+            raise ValueError('Некорректный курсор')
+        # В курсоре может оказаться любой JSON: [1, 1], [{}, 1], числа
+        # больше INTEGER базы. Сами курсоры — только строки и целые.
+        if not all(map(is_cursor_value, values)):
+            raise ValueError('Некорректный курсор')
+        opts = self.object_list.model._meta
+        try:
+            return [
+                opts.get_field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (TypeError, ValidationError):
+            raise ValueError('Некорректный курсор')
+
+    def seek(self, values, lookup):
+        condition = Q()
+        for position, key in enumerate(self.keys):
+            step = Q(**{f'{key}__{lookup}': values[position]})
+            for prefix_key, value in zip(self.keys, values[:position]):
+                step &= Q(**{prefix_key: value})
+            condition |= step
+        # Нестрогое условие на первый ключ даёт SQLite диапазон по индексу,
+        # по одному OR-условию планировщик его не находит.
+        bound = {f'{self.keys[0]}__{lookup}e': values[0]}
+        return self.object_list.filter(condition, **bound)
+
+    def page(self, after=None, before=None):
+        descending = [f'-{key}' for key in self.keys]
+        if before:
+            values = self.parse_cursor(before)
+            rows = list(
+                self.seek(values, 'gt')
+                .order_by(*self.keys)[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.object_list.order_by(*descending)
+            if after:
+                queryset = self.seek(self.parse_cursor(after), 'lt')
+                queryset = queryset.order_by(*descending)
+            rows = list(queryset[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = bool(after)
+        if not rows:
+            return KeysetPage(rows, self)
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=self.cursor_for(rows[-1]) if has_next else None,
+            previous_cursor=(
+                self.cursor_for(rows[0]) if has_previous else None
+            ),
+        )
+
+    def get_page(self, after=None, before=None):
+        """Как `page`, но с некорректным курсором отдаёт первую страницу."""
+        try:
+            return self.page(after=after, before=before)
+        except ValueError:
+            return self.page()
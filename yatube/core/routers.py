@@ -0,0 +1,86 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_COOKIE = 'replica_pin'
+SYNCED_KEY = 'replica:synced:{}'
+# Сессии пишутся на каждом входе, читать их с отстающей реплики нельзя.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_local = threading.local()
+
+
+@contextmanager
+def use_replica(alias):
+    """Направляет чтения текущего потока в базу `alias`."""
+    previous = getattr(_local, 'alias', None)
+    _local.alias = alias
+    try:
+        yield
+    finally:
+        _local.alias = previous
+
+
+def current_replica():
+    """Реплика, из которой сейчас читает поток, или None."""
+    return getattr(_local, 'alias', None)
+
+
+def mark_synced(alias, moment):
+    """Запоминает, что в реплике есть всё записанное до moment."""
+    cache.set(SYNCED_KEY.format(alias), moment, timeout=None)
+
+
+def synced_at(alias):
+    """Момент снимка реплики; неизвестный — считается очень старым."""
+    return cache.get(SYNCED_KEY.format(alias), 0)
+
+
+def is_pinned(request):
+    """Пользователь недавно писал и должен видеть свои изменения."""
+    try:
+        written_at = float(request.COOKIES[PIN_COOKIE])
+    except (KeyError, ValueError):
+        return False
+    return time.time() - written_at < settings.REPLICA_PIN_SECONDS
+
+
+def read_from_replica(view):
+    """Выполняет view с чтением из случайной реплики DATABASE_REPLICAS.
+
+    Пользователь сессии загружается заранее, с основной базы.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not settings.DATABASE_REPLICAS or is_pinned(request):
+            return view(request, *args, **kwargs)
+        user = getattr(request, 'user', None)
+        if user is not None:
+            user.is_authenticated
+        with use_replica(random.choice(settings.DATABASE_REPLICAS)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения внутри use_replica — в реплику, всё остальное — в default."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return getattr(_local, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них можно связывать.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == 'default'
@@ -0,0 +1,32 @@
+from django.conf import settings
+
+# busy_timeout идёт первым: смена journal_mode тоже ждёт блокировку.
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode')
+
+
+def pragma_statements(pragmas):
+    names = sorted(pragmas, key=lambda name: (
+        PRAGMA_ORDER.index(name) if name in PRAGMA_ORDER
+        else len(PRAGMA_ORDER), name
+    ))
+    return [f'PRAGMA {name} = {pragmas[name]}' for name in names]
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite.
+
+    Без WAL любая запись в post_create или post_edit блокирует чтение
+    всех остальных запросов до конца транзакции. Отдельной базе можно
+    задать свои PRAGMA ключом PRAGMAS в DATABASES.
+
+    PRAGMA выполняются на соединении DB-API напрямую, мимо обёрток
+    Django: иначе первый запрос процесса засчитывал бы их в свой бюджет.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get(
+        'PRAGMAS', getattr(settings, 'SQLITE_PRAGMAS', None))
+    if not pragmas:
+        return
+    for statement in pragma_statements(pragmas):
+        connection.connection.execute(statement)
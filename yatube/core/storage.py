@@ -0,0 +1,33 @@
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """Имена с хэшем содержимого, рядом — копии .gz и .br.
+
+    Всё готовится в collectstatic; WhiteNoise отдаёт такие файлы с
+    immutable и выбирает сжатую копию по Accept-Encoding. Пока
+    collectstatic не запускали (тесты, свежий checkout), манифеста нет
+    и ссылки ведут на исходные имена.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище файлов, чьи имена выводятся из содержимого.
+
+    Одно имя — одно содержимое, поэтому существующий файл не
+    перезаписывается и не получает суффикс, а просто переиспользуется.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
@@ -0,0 +1,27 @@
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+class QueryBudgetTestMixin:
+    """Проверки бюджета SQL-запросов из settings.QUERY_BUDGETS."""
+
+    def assertWithinQueryBudget(self, client, url, method='get'):
+        view_name = resolve(urlparse(url).path).view_name
+        self.assertIn(
+            view_name, settings.QUERY_BUDGETS,
+            f'Для {view_name} не задан бюджет в QUERY_BUDGETS'
+        )
+        budget = settings.QUERY_BUDGETS[view_name]['queries']
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url)
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{view_name} ({url}): {len(queries)} запросов при бюджете '
+            f'{budget}:\n' + '\n'.join(
+                query['sql'] for query in queries.captured_queries)
+        )
+        return response
@@ -0,0 +1,46 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware.query_budget import QueryBudgetExceeded
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    @override_settings(QUERY_BUDGET_TIMING_HEADER=True)
+    def test_server_timing_header(self):
+        """Ответ несёт число запросов и время SQL в Server-Timing"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;desc="\d+ queries";dur=[\d.]+$')
+
+    @override_settings(QUERY_BUDGET_TIMING_HEADER=False)
+    def test_no_server_timing_in_production(self):
+        """Без QUERY_BUDGET_TIMING_HEADER заголовка нет"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(QUERY_BUDGETS={'posts:index': {'queries': 0}},
+                       QUERY_BUDGET_RAISE=True)
+    def test_exceeded_budget_raises(self):
+        """Превышение бюджета при QUERY_BUDGET_RAISE — исключение"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGETS={'posts:index': {'queries': 0}},
+                       QUERY_BUDGET_RAISE=False)
+    def test_exceeded_budget_logged(self):
+        """Без QUERY_BUDGET_RAISE превышение пишется в лог"""
+        with self.assertLogs('yatube.query_budget', 'WARNING') as logs:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', logs.output[0])
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': {'queries': 100, 'ms': 0}},
+        QUERY_BUDGET_RAISE=True,
+    )
+    def test_slow_sql_only_logged(self):
+        """Медленный SQL не ломает страницу даже при QUERY_BUDGET_RAISE"""
+        with self.assertLogs('yatube.query_budget', 'WARNING') as logs:
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('мс SQL', logs.output[0])
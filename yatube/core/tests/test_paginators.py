@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.paginators import ApproximatePaginator
+from posts.models import Post, User
+
+
+class ApproximatePaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост номер {i}', author=cls.user)
+            for i in range(95)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.posts = Post.objects.order_by('-pub_date', '-id')
+
+    def test_window_around_current_page(self):
+        """Ссылки рисуются только для окна вокруг текущей страницы"""
+        page = ApproximatePaginator(self.posts, 5, window=2).get_page(10)
+        self.assertEqual(list(page.page_window), [8, 9, 10, 11, 12])
+        last = ApproximatePaginator(self.posts, 5, window=2).get_page(19)
+        self.assertEqual(list(last.page_window), [17, 18, 19])
+        self.assertFalse(last.has_next())
+
+    def test_count_is_cached(self):
+        """COUNT(*) выполняется один раз на время жизни кэша"""
+        for expected_queries in (2, 1):
+            with self.assertNumQueries(expected_queries):
+                page = ApproximatePaginator(
+                    self.posts, 10, cache_key='count').get_page(2)
+                self.assertEqual(page.paginator.num_pages, 10)
+
+    def test_stale_count_keeps_navigation(self):
+        """Заниженная оценка не прячет следующие страницы"""
+        page = ApproximatePaginator(self.posts, 10, count=20).get_page(2)
+        self.assertTrue(page.has_next())
+        self.assertEqual(list(page.page_window), [1, 2, 3])
+        self.assertEqual(
+            len(ApproximatePaginator(self.posts, 10, count=20,
+                                     window=2).get_page(4)),
+            10
+        )
+
+    def test_out_of_range_page_without_second_count(self):
+        """Страница за пределами ленты отдаёт последнюю без нового COUNT"""
+        paginator = ApproximatePaginator(self.posts, 10, count=95)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(500)
+        self.assertEqual(page.number, 10)
+        overestimated = ApproximatePaginator(self.posts, 10, count=1000)
+        self.assertEqual(overestimated.get_page(500).number, 1)
+
+    def test_huge_page_number(self):
+        """Огромный номер страницы не доходит до OFFSET"""
+        paginator = ApproximatePaginator(self.posts, 10, count=95)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(2 ** 63 - 1)
+        self.assertEqual(page.number, 10)
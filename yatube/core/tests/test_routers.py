@@ -0,0 +1,88 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connections
+from django.test import (
+    Client, SimpleTestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.routers import PIN_COOKIE, ReplicaRouter, mark_synced, use_replica
+from posts.freshness import SITE_SCOPE, touch
+from posts.models import Post, User
+
+
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_follow_context(self):
+        """Чтения идут в реплику только внутри use_replica"""
+        self.assertIsNone(self.router.db_for_read(Post))
+        with use_replica('replica'):
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+            self.assertIsNone(self.router.db_for_read(Session))
+        self.assertIsNone(self.router.db_for_read(Post))
+
+    def test_migrations_on_primary_only(self):
+        """Миграции применяются только к default"""
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], JOBS_EAGER=True)
+class ReplicaViewsTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(author=self.user, text='Тестовый пост')
+        # Сайт и рейтинг уже с метками: без них страницы считались бы
+        # изменёнными только что.
+        touch(SITE_SCOPE, 'trending')
+        mark_synced('replica', time.time())
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def get_counting(self, url):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(url)
+        return response, len(replica)
+
+    def test_feeds_read_from_replica(self):
+        """Ленты и пост читаются из реплики"""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ):
+            with self.subTest(url=url):
+                response, replica_queries = self.get_counting(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(replica_queries, 0)
+                self.assertContains(response, 'Тестовый пост')
+
+    def test_changed_page_read_from_default(self):
+        """Страница, изменённая после снимка реплики, читается из default"""
+        self.post.text = 'Исправлено'
+        self.post.save()
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response, replica_queries = self.get_counting(url)
+        self.assertEqual(replica_queries, 0)
+        self.assertContains(response, 'Исправлено')
+        mark_synced('replica', time.time())
+        _, replica_queries = self.get_counting(url)
+        self.assertGreater(replica_queries, 0)
+
+    def test_reads_pinned_after_write(self):
+        """После записи пользователь читает из default"""
+        response = self.client.post(reverse('posts:post_create'),
+                                    data={'text': 'Новый пост'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response, replica_queries = self.get_counting(reverse('posts:index'))
+        self.assertEqual(replica_queries, 0)
+        self.assertContains(response, 'Новый пост')
@@ -0,0 +1,39 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.middleware.query_budget import QueryStats
+from core.sqlite import configure_connection, pragma_statements
+
+
+class SqlitePragmasTest(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_configured(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS"""
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        # 1 — NORMAL.
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+
+    # synchronous нельзя менять внутри транзакции теста.
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -64 * 1024})
+    def test_pragmas_not_counted(self):
+        """PRAGMA нового соединения не попадают в счёт запросов"""
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            configure_connection(sender=None, connection=connection)
+        self.assertEqual(stats.count, 0)
+
+
+class PragmaStatementsTest(SimpleTestCase):
+    def test_busy_timeout_first(self):
+        """busy_timeout и journal_mode выставляются раньше остальных"""
+        self.assertEqual(
+            pragma_statements({'cache_size': -2000, 'journal_mode': 'wal',
+                               'busy_timeout': 100}),
+            ['PRAGMA busy_timeout = 100', 'PRAGMA journal_mode = wal',
+             'PRAGMA cache_size = -2000'],
+        )
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, override_settings
+
+CSS = 'body { color: #000; }\n' * 100
+
+
+class StaticFilesTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'w') as css:
+            css.write(CSS)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root)
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source)
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+
+    def collectstatic(self):
+        # Статика админки не нужна тесту и только замедляет его.
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     ignore_patterns=['admin'], stdout=StringIO())
+        return staticfiles_storage.url('css/site.css')
+
+    def test_plain_names_before_collectstatic(self):
+        """Без манифеста ссылки ведут на исходные имена"""
+        with override_settings(STATIC_ROOT=os.path.join(self.root, 'missing')):
+            self.assertEqual(staticfiles_storage.url('css/site.css'),
+                             '/static/css/site.css')
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """collectstatic даёт имя с хэшем и копии в gzip и brotli"""
+        url = self.collectstatic()
+        self.assertRegex(url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        path = os.path.join(self.root, url[len('/static/'):])
+        for suffix in ('', '.gz', '.br'):
+            with self.subTest(suffix=suffix):
+                self.assertTrue(os.path.exists(path + suffix))
+
+    def test_serves_precompressed_immutable(self):
+        """Хэшированный файл отдаётся сжатым заранее и с immutable"""
+        url = self.collectstatic()
+        for encoding in ('br', 'gzip'):
+            with self.subTest(encoding=encoding):
+                response = Client().get(
+                    url, HTTP_ACCEPT_ENCODING=f'{encoding}, deflate')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertIn('immutable', response['Cache-Control'])
+                response.close()
@@ -0,0 +1,110 @@
+from unittest import mock
+
+from django.db import IntegrityError, OperationalError
+from django.db.models.signals import post_save
+from django.test import TransactionTestCase, override_settings
+
+from core.writes import WriteQueue, with_retry
+from posts.models import AuthorStats, Group, Post, User
+
+
+def lock_once(sender, **kwargs):
+    """Первая запись поста после сигналов счётчиков упирается в блокировку"""
+    post_save.disconnect(lock_once, sender=Post)
+    raise OperationalError('database is locked')
+
+
+@override_settings(WRITE_RETRIES=2, WRITE_RETRY_DELAY=0)
+class WithRetryTest(TransactionTestCase):
+    def flaky(self, failures, message='database is locked'):
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(message)
+            return 'ok'
+        return func, calls
+
+    def test_retries_lock_errors(self):
+        """Запись повторяется, пока база заблокирована"""
+        func, calls = self.flaky(failures=2)
+        self.assertEqual(with_retry(func), 'ok')
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_retries(self):
+        """После WRITE_RETRIES повторов ошибка уходит вызывающему"""
+        func, calls = self.flaky(failures=3)
+        with self.assertRaises(OperationalError):
+            with_retry(func)
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_not_retried(self):
+        """Ошибки, не связанные с блокировкой, не повторяются"""
+        func, calls = self.flaky(failures=1, message='no such table: x')
+        with self.assertRaises(OperationalError):
+            with_retry(func)
+        self.assertEqual(len(calls), 1)
+
+    def test_retried_create_stays_create(self):
+        """Повтор после блокировки снова создаёт пост, а не обновляет"""
+        post = Post(text='Пост', author=User.objects.create_user('auth'))
+        post_save.connect(lock_once, sender=Post)
+        self.addCleanup(post_save.disconnect, lock_once, sender=Post)
+        with_retry(post.save)
+        post.refresh_from_db()
+        self.assertEqual(post.version, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(author=post.author).posts_count, 1)
+
+
+@override_settings(WRITE_BATCH_WINDOW=0.5, WRITE_BATCH_SIZE=10)
+class WriteQueueTest(TransactionTestCase):
+    def create_group(self, number):
+        return Group.objects.create(
+            title=f'Группа {number}', slug=f'group-{number}',
+            description='Тестовое описание')
+
+    def test_close_writes_share_transaction(self):
+        """Записи, пришедшие рядом, выполняются одной пачкой"""
+        writes = WriteQueue()
+        with mock.patch.object(writes, '_apply',
+                               wraps=writes._apply) as apply:
+            futures = [writes.submit(self.create_group, number)
+                       for number in range(3)]
+            groups = [future.result(timeout=5) for future in futures]
+        self.assertEqual(apply.call_count, 1)
+        self.assertEqual(
+            set(Group.objects.values_list('pk', flat=True)),
+            {group.pk for group in groups}
+        )
+
+    def test_failed_write_keeps_neighbours(self):
+        """Ошибка одной записи не откатывает остальные из пачки"""
+        writes = WriteQueue()
+        first = writes.submit(self.create_group, 1)
+        duplicate = writes.submit(self.create_group, 1)
+        second = writes.submit(self.create_group, 2)
+        self.assertIsNotNone(first.result(timeout=5).pk)
+        self.assertIsNotNone(second.result(timeout=5).pk)
+        with self.assertRaises(IntegrityError):
+            duplicate.result(timeout=5)
+        self.assertEqual(Group.objects.count(), 2)
+
+    @override_settings(WRITE_RETRIES=2, WRITE_RETRY_DELAY=0)
+    def test_retried_batch_keeps_creates(self):
+        """Пачка после блокировки повторяется с исходными объектами"""
+        author = User.objects.create_user('auth')
+        first = Post(text='Первый', author=author)
+        second = Post(text='Второй', author=author)
+        writes = WriteQueue()
+        post_save.connect(lock_once, sender=Post)
+        self.addCleanup(post_save.disconnect, lock_once, sender=Post)
+        futures = [writes.submit(first.save), writes.submit(second.save)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', 'version')),
+            [('Первый', 0), ('Второй', 0)]
+        )
+        self.assertEqual(AuthorStats.objects.get(author=author).posts_count, 2)
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+
+def media(request, path):
+    """Загруженные картинки и миниатюры.
+
+    Их имена выводятся из содержимого, поэтому ответ можно кэшировать
+    навсегда. За веб-сервером MEDIA_ROOT лучше отдавать им самим, с
+    теми же заголовками.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    patch_cache_control(
+        response, public=True, max_age=settings.MEDIA_MAX_AGE, immutable=True)
+    return response
@@ -0,0 +1,173 @@
+import copy
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Model
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def _instances(func, args, kwargs):
+    """Объекты моделей, которые запись может поменять на месте.
+
+    Это сам объект метода (post.save), объект ModelForm (form.save)
+    и модели в аргументах, в том числе списки для bulk_create.
+    """
+    for value in (getattr(func, '__self__', None), *args, *kwargs.values()):
+        value = getattr(value, 'instance', value)
+        if isinstance(value, Model):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            yield from (item for item in value if isinstance(item, Model))
+
+
+def _snapshot(objects):
+    return [(obj, dict(obj.__dict__), copy.copy(obj._state))
+            for obj in objects]
+
+
+def _restore(saved):
+    """Возвращает объекты к состоянию до отменённой попытки.
+
+    Откат транзакции не трогает память: после него у нового поста уже
+    есть pk, _state.adding=False и увеличенная version, и повторный
+    save() стал бы обновлением — post_save пришёл бы с created=False.
+    """
+    for obj, fields, state in saved:
+        obj.__dict__.clear()
+        obj.__dict__.update(fields)
+        obj._state = copy.copy(state)
+
+
+def _retry(func, objects):
+    delay = settings.WRITE_RETRY_DELAY
+    saved = _snapshot(objects)
+    for attempt in range(settings.WRITE_RETRIES + 1):
+        try:
+            with transaction.atomic():
+                return func()
+        except OperationalError as exc:
+            if attempt == settings.WRITE_RETRIES or not is_lock_error(exc):
+                raise
+        _restore(saved)
+        time.sleep(delay * (1 + random.random()))
+        delay *= 2
+
+
+def with_retry(func, *args, **kwargs):
+    """Выполняет запись в своей транзакции, повторяя её при блокировке.
+
+    Паузы растут вдвое от WRITE_RETRY_DELAY, со случайным разбросом,
+    чтобы писатели из разных процессов не просыпались одновременно.
+    Перед повтором объекты моделей из вызова возвращаются к исходному
+    состоянию. Внутри чужой транзакции повтор невозможен — тогда это
+    обычный вызов.
+    """
+    if connection.in_atomic_block:
+        return func(*args, **kwargs)
+    return _retry(lambda: func(*args, **kwargs),
+                  _instances(func, args, kwargs))
+
+
+class WriteQueue:
+    """Один поток-писатель на процесс.
+
+    Записи, пришедшие в пределах WRITE_BATCH_WINDOW секунд, но не больше
+    WRITE_BATCH_SIZE, выполняются в одной транзакции, каждая в своей
+    точке сохранения: ошибка одной записи не откатывает соседние. При
+    блокировке базы другим процессом пачка повторяется целиком, а объекты
+    моделей из всех её вызовов перед повтором возвращаются к исходному
+    состоянию. Других изменений в памяти операции делать не должны.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        self._start()
+        return future
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name='writer', daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.WRITE_BATCH_WINDOW
+        while len(batch) < settings.WRITE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return [
+            item for item in batch if item[0].set_running_or_notify_cancel()
+        ]
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                outcomes = _retry(
+                    lambda: self._apply(batch),
+                    [obj for _, func, args, kwargs in batch
+                     for obj in _instances(func, args, kwargs)],
+                )
+            except Exception as exc:
+                # Соединение после сбоя могло остаться в плохом состоянии.
+                connection.close()
+                outcomes = [(None, exc)] * len(batch)
+            for (future, *_), (result, error) in zip(batch, outcomes):
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    def _apply(self, batch):
+        outcomes = []
+        for _, func, args, kwargs in batch:
+            try:
+                with transaction.atomic():
+                    outcomes.append((func(*args, **kwargs), None))
+            except OperationalError as exc:
+                if is_lock_error(exc):
+                    raise
+                outcomes.append((None, exc))
+            except Exception as exc:
+                outcomes.append((None, exc))
+        return outcomes
+
+
+write_queue = WriteQueue()
+
+
+def write(func, *args, **kwargs):
+    """Выполняет запись в базу и возвращает её результат.
+
+    С WRITE_QUEUE запись уходит потоку-писателю, вызывающий поток ждёт
+    её не дольше WRITE_TIMEOUT секунд. Без очереди и внутри уже открытой
+    транзакции (тесты, вложенные вызовы) — на месте, через with_retry.
+    """
+    if not settings.WRITE_QUEUE or connection.in_atomic_block:
+        return with_retry(func, *args, **kwargs)
+    return write_queue.submit(func, *args, **kwargs).result(
+        timeout=settings.WRITE_TIMEOUT)
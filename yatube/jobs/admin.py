@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'payload', 'status', 'attempts',
+                    'run_after', 'finished')
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+    readonly_fields = ('created', 'started', 'finished', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
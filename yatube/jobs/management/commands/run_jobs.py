@@ -0,0 +1,38 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from jobs.queue import PURGE_EVERY, purge, recover_stale, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Разбирает очередь фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1,
+                            help='сколько задач выполнять параллельно')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true',
+                            help='разобрать очередь и выйти')
+
+    def handle(self, *args, **options):
+        executor = None
+        if options['threads'] > 1:
+            executor = ThreadPoolExecutor(
+                options['threads'], thread_name_prefix='job')
+        purged_at = None
+        while True:
+            recover_stale()
+            if (purged_at is None
+                    or time.monotonic() - purged_at > PURGE_EVERY):
+                purge()
+                purged_at = time.monotonic()
+            count = run_pending(executor)
+            if count:
+                self.stdout.write(f'Выполнено задач: {count}')
+            if options['once']:
+                break
+            if not count:
+                time.sleep(options['sleep'])
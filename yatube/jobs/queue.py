@@ -0,0 +1,199 @@
+"""Очередь фоновых задач в таблице Job.
+
+Задача — функция с декоратором @task, её аргументы хранятся в JSON.
+enqueue пишет задачу в текущую транзакцию, поэтому задача появляется в
+очереди только вместе с изменением, которое её породило, и переживает
+перезапуск. Очередь разбирает manage.py run_jobs, а с JOBS_IN_PROCESS
+ещё и фоновый поток веб-процесса.
+
+Задача может выполниться повторно: после ошибки, после смерти воркера
+(через JOBS_LEASE секунд) или когда её поставили снова. Поэтому задачи
+пересчитывают состояние по базе, а не применяют приращения.
+"""
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    IntegrityError, close_old_connections, connection, transaction
+)
+from django.db.models import F
+from django.utils import timezone
+
+from core.writes import write
+
+from .models import Job
+
+logger = logging.getLogger('yatube.jobs')
+registry = {}
+# Как часто воркеры удаляют старые выполненные задачи, в секундах.
+PURGE_EVERY = 3600
+
+
+def task(func):
+    """Регистрирует функцию как фоновую задачу под именем модуль.функция."""
+    func.job_name = f'{func.__module__}.{func.__name__}'
+    registry[func.job_name] = func
+    return func
+
+
+def enqueue(func, *args, key=None):
+    """Ставит в очередь вызов func(*args).
+
+    Пока задача с тем же key ждёт в очереди, такая же не добавляется.
+    С JOBS_EAGER задача выполняется сразу, без очереди.
+    """
+    if settings.JOBS_EAGER:
+        func(*args)
+        return
+    job = Job(name=func.job_name, payload=json.dumps(args), key=key)
+    write(Job.objects.bulk_create, [job], ignore_conflicts=True)
+    if settings.JOBS_IN_PROCESS:
+        transaction.on_commit(worker.wake)
+
+
+def claim(limit):
+    """Забирает до limit готовых задач.
+
+    Задача переходит в running условным UPDATE, поэтому два воркера не
+    возьмут одну задачу.
+    """
+    now = timezone.now()
+    ready = Job.objects.filter(status=Job.PENDING, run_after__lte=now)
+    claimed = [
+        pk for pk in ready.values_list('id', flat=True)[:limit]
+        if write(
+            Job.objects.filter(pk=pk, status=Job.PENDING).update,
+            status=Job.RUNNING, started=now, attempts=F('attempts') + 1,
+        )
+    ]
+    return list(Job.objects.filter(pk__in=claimed))
+
+
+def release(job, error):
+    """Возвращает упавшую задачу в очередь с паузой или отмечает провал.
+
+    Пауза — JOBS_RETRY_DELAY секунд, вдвое больше с каждой попыткой.
+    """
+    now = timezone.now()
+    jobs = Job.objects.filter(pk=job.pk)
+    if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+        jobs.update(status=Job.FAILED, finished=now, last_error=error)
+        return
+    delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+    try:
+        with transaction.atomic():
+            jobs.update(status=Job.PENDING, last_error=error,
+                        run_after=now + timedelta(seconds=delay))
+    except IntegrityError:
+        # Пока задача выполнялась, такую же поставили снова — повторит она.
+        jobs.update(status=Job.DONE, finished=now, last_error=error)
+
+
+def run_job(job):
+    func = registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        func(*json.loads(job.payload))
+    except Exception:
+        logger.exception('Задача %s не выполнена', job)
+        write(release, job, traceback.format_exc())
+    else:
+        write(Job.objects.filter(pk=job.pk).update,
+              status=Job.DONE, finished=timezone.now(), last_error='')
+
+
+def _run_in_thread(job):
+    close_old_connections()
+    try:
+        run_job(job)
+    finally:
+        connection.close()
+
+
+def run_pending(executor=None):
+    """Выполняет готовые задачи, пока они есть; возвращает их число.
+
+    С executor пачка из JOBS_BATCH_SIZE задач выполняется параллельно.
+    """
+    count = 0
+    while True:
+        jobs = claim(settings.JOBS_BATCH_SIZE)
+        if not jobs:
+            return count
+        if executor is None:
+            for job in jobs:
+                run_job(job)
+        else:
+            list(executor.map(_run_in_thread, jobs))
+        count += len(jobs)
+
+
+def recover_stale():
+    """Возвращает в очередь задачи воркеров, умерших посреди работы."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_LEASE)
+    stale = Job.objects.filter(status=Job.RUNNING, started__lt=deadline)
+    for job in stale:
+        write(release, job, 'Истёк срок выполнения')
+
+
+def purge():
+    """Удаляет выполненные задачи старше JOBS_KEEP_DAYS дней."""
+    deadline = timezone.now() - timedelta(days=settings.JOBS_KEEP_DAYS)
+    return write(Job.objects.filter(
+        status=Job.DONE, finished__lt=deadline).delete)[0]
+
+
+class Worker:
+    """Фоновый поток веб-процесса, разбирающий очередь.
+
+    Запускается из wsgi.py, поэтому тесты, команды и shell его не
+    получают. Просыпается после коммита с новой задачей, а без них — раз
+    в JOBS_POLL_INTERVAL секунд, чтобы забрать отложенные повторы. Как и
+    run_jobs, возвращает в очередь задачи, брошенные при перезапуске, и
+    раз в PURGE_EVERY секунд чистит выполненные.
+    """
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._purged_at = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name='jobs', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def run_once(self):
+        """Один проход: брошенные задачи, чистка и готовые задачи."""
+        recover_stale()
+        if (self._purged_at is None
+                or time.monotonic() - self._purged_at > PURGE_EVERY):
+            purge()
+            self._purged_at = time.monotonic()
+        return run_pending()
+
+    def _loop(self):
+        while True:
+            self._wakeup.wait(timeout=settings.JOBS_POLL_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception('Сбой разбора очереди задач')
+            finally:
+                connection.close()
+
+
+worker = Worker()
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import Worker, enqueue, recover_stale, run_pending, task
+from posts.models import Post, User
+from posts.search import search_posts
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task
+def explode():
+    raise ValueError('сбой задачи')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=0)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_deduplicates_pending_key(self):
+        """Пока задача ждёт в очереди, такая же по ключу не ставится"""
+        enqueue(record, 1, key='record')
+        enqueue(record, 2, key='record')
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'jobs.tests.test_queue.record')
+        self.assertEqual(job.payload, '[1]')
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(calls, [])
+
+    def test_run_pending_marks_done(self):
+        """Воркер выполняет задачи, после чего ключ снова свободен"""
+        enqueue(record, 1, key='record')
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        enqueue(record, 2, key='record')
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1, 2])
+
+    def test_failed_job_retried_then_failed(self):
+        """Упавшая задача повторяется до JOBS_MAX_ATTEMPTS раз"""
+        enqueue(explode)
+        with self.assertLogs('yatube.jobs', 'ERROR'):
+            self.assertEqual(run_pending(), 2)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('сбой задачи', job.last_error)
+
+    def test_stale_running_job_requeued(self):
+        """Задача умершего воркера возвращается в очередь"""
+        Job.objects.create(
+            name=record.job_name, payload='[3]', status=Job.RUNNING,
+            attempts=1, started=timezone.now() - timedelta(hours=1),
+        )
+        recover_stale()
+        self.assertEqual(Job.objects.get().status, Job.PENDING)
+        run_pending()
+        self.assertEqual(calls, [3])
+
+    def test_worker_recovers_and_purges(self):
+        """Поток веб-процесса сам поднимает брошенные задачи и чистит
+        старые выполненные"""
+        long_ago = timezone.now() - timedelta(days=30)
+        Job.objects.create(
+            name=record.job_name, payload='[5]', status=Job.RUNNING,
+            attempts=1, started=timezone.now() - timedelta(hours=1),
+        )
+        Job.objects.create(
+            name=record.job_name, payload='[6]', status=Job.DONE,
+            finished=long_ago,
+        )
+        self.assertEqual(Worker().run_once(), 1)
+        self.assertEqual(calls, [5])
+        self.assertEqual(
+            list(Job.objects.values_list('status', flat=True)), [Job.DONE])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_runs_immediately(self):
+        """С JOBS_EAGER задача выполняется без очереди"""
+        enqueue(record, 4)
+        self.assertEqual(calls, [4])
+        self.assertFalse(Job.objects.exists())
+
+
+class PostJobsTest(TestCase):
+    def test_post_create_only_enqueues(self):
+        """Создание поста ставит индексацию в очередь, её выполняет run_jobs"""
+        user = User.objects.create_user(username='auth')
+        client = Client()
+        client.force_login(user)
+        client.post(reverse('posts:post_create'),
+                    data={'text': 'Отложенная индексация'})
+        post = Post.objects.get()
+        self.assertEqual(
+            set(Job.objects.values_list('key', flat=True)),
+            {f'index_post:{post.pk}', f'fan_out:{post.pk}'},
+        )
+        self.assertEqual(list(search_posts('отложенная', 10)), [])
+        call_command('run_jobs', once=True, stdout=StringIO())
+        self.assertEqual(list(search_posts('отложенная', 10)), [post])
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
@@ -1,19 +1,187 @@
+import hashlib
+from itertools import islice
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
-from .models import Group, Post
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.utils import timezone
+
+from core.paginators import ApproximatePaginator
+from jobs.queue import enqueue
+
+from . import tasks
+from .models import AuthorStats, Follow, Group, Post
+from .search import match_expression, matching_ids
+from .transfer import export_rows, gzip_chunks, serialize_rows
+
+AUTHORS_SHOWN = 20
+
+
+def export_response(queryset, fmt):
+    """Сжатая выгрузка выбранных постов, отдаётся потоком."""
+    name = f'posts-{timezone.now():%Y%m%d-%H%M%S}.{fmt}.gz'
+    response = StreamingHttpResponse(
+        gzip_chunks(serialize_rows(export_rows(queryset), fmt)),
+        content_type='application/gzip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}"'
+    return response
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        empty_label='Без группы',
+    )
+
+    def __init__(self, *args, admin_site, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.fields['group']
+        field.widget = AutocompleteSelect(
+            Post._meta.get_field('group').remote_field, admin_site)
+        field.widget.choices = field.choices
+
+
+def enqueue_chunks(queryset, func, *args):
+    """Ставит func(ids, *args) на каждую пачку из ADMIN_BULK_CHUNK_SIZE
+    постов выборки; возвращает число постов."""
+    post_ids = queryset.order_by('pk').values_list('pk', flat=True).iterator(
+        chunk_size=settings.ADMIN_BULK_CHUNK_SIZE)
+    total = 0
+    # Одна транзакция: в очередь попадают все пачки или ни одной.
+    with transaction.atomic():
+        for chunk in iter(
+                lambda: list(islice(post_ids, settings.ADMIN_BULK_CHUNK_SIZE)),
+                []):
+            enqueue(func, chunk, *args)
+            total += len(chunk)
+    return total
 
 
 class PostAdmin(admin.ModelAdmin):
+    """Список постов без запросов, растущих с таблицей.
+
+    Авторы и группы берутся JOIN, число результатов — из кэша
+    ApproximatePaginator, полного COUNT(*) нет, даты и фильтр по ним идут
+    по индексу post_pub_date_id_idx. Массовые изменения — фоновые задачи.
+    """
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    list_editable = ('group',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = ('export_jsonl', 'export_csv', 'move_to_group',
+               'delete_author_posts')
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        # Ключ — по фильтрам из адреса: str(query) пустой выборки
+        # бросает EmptyResultSet.
+        params = request.GET.copy()
+        for name in (PAGE_VAR, ORDER_VAR):
+            params.pop(name, None)
+        query = hashlib.md5(params.urlencode().encode()).hexdigest()
+        return ApproximatePaginator(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            cache_key=f'admin:posts:count:{query}',
+        )
+
+    def bulk_action_page(self, request, action, title, description,
+                         **context):
+        return TemplateResponse(
+            request, 'admin/posts/post/bulk_action.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'title': title,
+                'description': description,
+                'action': action,
+                'action_checkbox_name': ACTION_CHECKBOX_NAME,
+                'select_across': request.POST.get('select_across') == '1',
+                'selected': request.POST.getlist(ACTION_CHECKBOX_NAME),
+                **context,
+            }
+        )
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(
+            request.POST if 'post' in request.POST else None,
+            admin_site=self.admin_site,
+        )
+        if form.is_valid():
+            group = form.cleaned_data['group']
+            total = enqueue_chunks(
+                queryset, tasks.move_posts, group.pk if group else None)
+            self.message_user(
+                request, f'Перенос {total} постов поставлен в очередь')
+            return None
+        return self.bulk_action_page(
+            request, 'move_to_group', 'Перенос в группу',
+            'Выбранные посты будут перенесены фоновыми задачами.',
+            form=form, media=self.media + form.media,
+        )
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def delete_author_posts(self, request, queryset):
+        author_ids = list(
+            queryset.order_by().values_list('author_id', flat=True).distinct()
+        )
+        if 'post' in request.POST:
+            with transaction.atomic():
+                for author_id in author_ids:
+                    enqueue(tasks.delete_author_posts, author_id,
+                            key=f'delete_author_posts:{author_id}')
+            self.message_user(
+                request,
+                f'Удаление постов {len(author_ids)} авторов поставлено '
+                f'в очередь'
+            )
+            return None
+        return self.bulk_action_page(
+            request, 'delete_author_posts', 'Удаление постов авторов',
+            'Будут удалены все посты этих авторов, а не только выбранные:',
+            authors=AuthorStats.objects.filter(
+                author_id__in=author_ids[:AUTHORS_SHOWN]
+            ).select_related('author').order_by('-posts_count'),
+            more_authors=len(author_ids) > AUTHORS_SHOWN,
+        )
+    delete_author_posts.short_description = 'Удалить все посты авторов'
+    delete_author_posts.allowed_permissions = ('delete',)
+
+    def export_jsonl(self, request, queryset):
+        return export_response(queryset, 'jsonl')
+    export_jsonl.short_description = 'Выгрузить в JSONL (gzip)'
+
+    def export_csv(self, request, queryset):
+        return export_response(queryset, 'csv')
+    export_csv.short_description = 'Выгрузить в CSV (gzip)'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        if not match_expression(search_term):
+            return queryset.none(), False
+        return queryset.filter(pk__in=matching_ids(search_term)), False
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'description')
+    search_fields = ('title', 'slug')
     empty_value_display = 'пусто'
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Follow)
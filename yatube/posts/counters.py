@@ -0,0 +1,212 @@
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DateTimeField, F, OuterRef, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import AuthorStats, Group, GroupActivity, GroupStats, Post
+
+
+def bump_group(group_id, delta):
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+def bump_author(author_id, delta):
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats = stats.filter(posts_count__gte=-delta)
+    if stats.update(posts_count=F('posts_count') + delta) or delta < 0:
+        return
+    # Строки ещё нет: считаем один раз, пост уже сохранён и попадёт в счёт.
+    AuthorStats.objects.get_or_create(
+        author_id=author_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=author_id).count()
+        }
+    )
+
+
+def activity_start():
+    """Первый день окна активности групп."""
+    return timezone.localdate() - timedelta(
+        days=settings.GROUP_ACTIVITY_DAYS - 1)
+
+
+def last_group_posts(group_id):
+    return Post.objects.filter(group_id=group_id).order_by(
+        '-pub_date').values('pub_date')[:1]
+
+
+def bump_group_activity(group_id, day, delta):
+    """Дневной счётчик группы; дни до окна активности не хранятся."""
+    if group_id is None or day < activity_start():
+        return
+    activity = GroupActivity.objects.filter(group_id=group_id, day=day)
+    if delta < 0:
+        activity = activity.filter(posts_count__gte=-delta)
+    if activity.update(posts_count=F('posts_count') + delta) or delta < 0:
+        return
+    # Первый пост дня: считаем день один раз, пост уже сохранён.
+    start = timezone.make_aware(datetime.combine(day, time()))
+    GroupActivity.objects.bulk_create([GroupActivity(
+        group_id=group_id,
+        day=day,
+        posts_count=Post.objects.filter(
+            group_id=group_id,
+            pub_date__gte=start,
+            pub_date__lt=start + timedelta(days=1),
+        ).count(),
+    )], ignore_conflicts=True)
+
+
+def refresh_group_stats(group_id):
+    """Пересобирает сводку группы по дневным счётчикам и индексу
+    постов группы, не просматривая сами посты."""
+    if group_id is None:
+        return
+    week_posts = GroupActivity.objects.filter(
+        group_id=group_id, day__gte=activity_start()
+    ).aggregate(total=Sum('posts_count'))['total']
+    GroupStats.objects.update_or_create(
+        group_id=group_id,
+        defaults={
+            'last_post': last_group_posts(group_id).values_list(
+                'pub_date', flat=True).first(),
+            'week_posts': week_posts or 0,
+        }
+    )
+
+
+def bump_group_stats(group_id, pub_date, delta):
+    """Учитывает в сводке группы добавленный или удалённый пост."""
+    if group_id is None:
+        return
+    day = timezone.localdate(pub_date)
+    bump_group_activity(group_id, day, delta)
+    week_delta = delta if day >= activity_start() else 0
+    stats = GroupStats.objects.filter(group_id=group_id)
+    if delta > 0:
+        updated = stats.update(
+            week_posts=F('week_posts') + week_delta,
+            last_post=Case(
+                When(last_post__gte=pub_date, then=F('last_post')),
+                default=Value(pub_date, output_field=DateTimeField()),
+            ),
+        )
+    else:
+        updated = stats.filter(week_posts__gte=-week_delta).update(
+            week_posts=F('week_posts') + week_delta,
+            # Ушёл последний пост — берём следующий по индексу группы.
+            last_post=Case(
+                When(last_post__lte=pub_date,
+                     then=Subquery(last_group_posts(group_id))),
+                default=F('last_post'),
+            ),
+        )
+    if not updated:
+        # Строки ещё нет: собираем её целиком, пост уже учтён.
+        refresh_group_stats(group_id)
+
+
+def move_group_stats(posts, group_id):
+    """Учитывает перенос постов (group_id, pub_date) в группу group_id."""
+    days = Counter(
+        (previous, timezone.localdate(pub_date))
+        for previous, pub_date in posts
+    )
+    for (previous, day), count in days.items():
+        bump_group_activity(previous, day, -count)
+        bump_group_activity(group_id, day, count)
+    for changed in {previous for previous, _ in days} | {group_id}:
+        refresh_group_stats(changed)
+
+
+def roll_group_activity():
+    """Сдвигает окно активности: забывает старые дни и пересчитывает
+    week_posts по оставшимся. Нужен раз в сутки."""
+    week_posts = (
+        GroupActivity.objects.filter(group=OuterRef('group'))
+        .order_by()
+        .values('group')
+        .annotate(total=Sum('posts_count'))
+        .values('total')
+    )
+    with transaction.atomic():
+        GroupActivity.objects.filter(day__lt=activity_start()).delete()
+        GroupStats.objects.update(
+            week_posts=Coalesce(Subquery(week_posts), 0))
+
+
+def rebuild_group_stats():
+    """Собирает сводки и дневные счётчики групп заново по постам."""
+    start = timezone.make_aware(datetime.combine(activity_start(), time()))
+    days = (
+        Post.objects.filter(group__isnull=False, pub_date__gte=start)
+        .annotate(day=TruncDate('pub_date'))
+        .order_by()
+        .values_list('group', 'day')
+        .annotate(total=Count('pk'))
+    )
+    last_posts = Post.objects.filter(group=OuterRef('pk')).order_by(
+        '-pub_date').values('pub_date')[:1]
+    with transaction.atomic():
+        GroupActivity.objects.all().delete()
+        week_posts = Counter()
+        activity = []
+        for group_id, day, total in days.iterator():
+            activity.append(GroupActivity(
+                group_id=group_id, day=day, posts_count=total))
+            week_posts[group_id] += total
+        GroupActivity.objects.bulk_create(activity, batch_size=500)
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(
+            (
+                GroupStats(
+                    group_id=group_id,
+                    last_post=last_post,
+                    week_posts=week_posts[group_id],
+                )
+                for group_id, last_post in Group.objects.annotate(
+                    last_post=Subquery(last_posts)
+                ).values_list('pk', 'last_post').iterator()
+            ),
+            batch_size=500
+        )
+
+
+def rebuild_counters():
+    group_counts = (
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by()
+        .values('group')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    author_counts = (
+        Post.objects.order_by()
+        .values_list('author')
+        .annotate(total=Count('pk'))
+    )
+    with transaction.atomic():
+        Group.objects.update(
+            posts_count=Coalesce(Subquery(group_counts), 0)
+        )
+        AuthorStats.objects.all().delete()
+        AuthorStats.objects.bulk_create(
+            (
+                AuthorStats(author_id=author_id, posts_count=total)
+                for author_id, total in author_counts.iterator()
+            ),
+            batch_size=500
+        )
+    rebuild_group_stats()
@@ -0,0 +1,149 @@
+"""RSS и Atom с последними постами сайта, группы и автора.
+
+Лента строится один раз на изменение её области (см. freshness) и
+отдаётся из кэша; читатель с актуальным ETag получает 304.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import freshness
+from .models import Group, Post, User
+
+FEED_KEY = 'feed:{}'
+
+
+def feed_etag(request, scope_func, *args, **kwargs):
+    """ETag ленты: одинаков для всех читателей, сессия не нужна."""
+    if not hasattr(request, '_feed_etag'):
+        current = freshness.version(request, scope_func, *args, **kwargs)
+        request._feed_etag = None if current is None else hashlib.md5(
+            f'{request.path}|{current[0]}|{current[1]}'.encode()
+        ).hexdigest()
+    return request._feed_etag
+
+
+def cached_feed(scope_func):
+    def decorator(view):
+        def etag(request, *args, **kwargs):
+            return feed_etag(request, scope_func, *args, **kwargs)
+
+        @wraps(view)
+        def cached(request, *args, **kwargs):
+            key = etag(request, *args, **kwargs)
+            if key is None:
+                return view(request, *args, **kwargs)
+            # Ключ меняется вместе с лентой, старые версии просто истекают.
+            response = cache.get(FEED_KEY.format(key))
+            if response is None:
+                response = view(request, *args, **kwargs)
+                cache.set(FEED_KEY.format(key), response,
+                          settings.FEED_CACHE_SECONDS)
+            return response
+        cached = condition(etag_func=etag)(cached)
+        return cache_control(public=True, no_cache=True)(cached)
+    return decorator
+
+
+class SiteFeed(Feed):
+    title = 'Yatube: последние посты'
+    description = 'Новые посты всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def items(self):
+        return latest(Post.objects.all())
+
+    def item_title(self, post):
+        return truncatechars(post.text, 60)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', kwargs={'post_id': post.pk})
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('posts:profile', kwargs={'username': post.author})
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class GroupFeed(SiteFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return latest(Post.objects.filter(group=group))
+
+
+class AuthorFeed(SiteFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def description(self, author):
+        return f'Новые посты автора {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return latest(Post.objects.filter(author=author))
+
+
+class SiteAtomFeed(SiteFeed):
+    feed_type = Atom1Feed
+    subtitle = SiteFeed.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupFeed.description
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorFeed.description
+
+
+def latest(posts):
+    """FEED_POSTS свежих постов по индексу (…, pub_date)."""
+    return posts.select_related('author', 'group').order_by(
+        '-pub_date')[:settings.FEED_POSTS]
+
+
+site_rss = cached_feed(freshness.index_scope)(SiteFeed())
+site_atom = cached_feed(freshness.index_scope)(SiteAtomFeed())
+group_rss = cached_feed(freshness.group_scope)(GroupFeed())
+group_atom = cached_feed(freshness.group_scope)(GroupAtomFeed())
+author_rss = cached_feed(freshness.profile_scope)(AuthorFeed())
+author_atom = cached_feed(freshness.profile_scope)(AuthorAtomFeed())
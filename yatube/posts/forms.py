@@ -5,12 +5,14 @@ from posts.models import Post
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('text', 'group')
+        fields = ('text', 'group', 'image')
         labels = {
             'group': 'Группа',
-            'text': 'Текст поста'
+            'text': 'Текст поста',
+            'image': 'Картинка'
         }
         help_texts = {
             'text': 'Текст нового поста',
-            'group': 'Группа, к которой будет относиться пост'
+            'group': 'Группа, к которой будет относиться пост',
+            'image': 'Картинка к посту'
         }
@@ -0,0 +1,165 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core.routers import current_replica, synced_at, use_replica
+
+from .models import Group, Post, User
+
+SITE_SCOPE = 'site'
+STAMP_KEY = 'freshness:{}'
+
+
+def touch(*scopes):
+    """Отмечает изменение областей: их валидаторы станут другими.
+
+    Отметки живут в кэше, поэтому несколько процессов должны делить один
+    кэш (memcached, redis), а не LocMemCache.
+    """
+    now = time.time()
+    cache.set_many(
+        {STAMP_KEY.format(scope): now for scope in scopes if scope},
+        timeout=None
+    )
+
+
+def post_scopes(post):
+    return [
+        'index',
+        f'post:{post.pk}',
+        f'author:{post.author_id}',
+        f'group:{post.group_id}' if post.group_id else None,
+    ]
+
+
+def stamps(scopes):
+    keys = [STAMP_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time() for key in keys if key not in found}
+    if missing:
+        # Потерянная отметка считается свежим изменением.
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def index_scope(request):
+    return ['index', 'trending'], Post.objects.aggregate(
+        last=Max('pub_date'))['last']
+
+
+def popular_scope(request, slug=None):
+    if slug is None:
+        return ['index', 'trending'], None
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True).first()
+    if group_id is None:
+        return None
+    return [f'group:{group_id}', 'trending'], None
+
+
+def groups_scope(request):
+    # Посты трогают 'index', группы — 'site', сдвиг окна — 'groups'.
+    return ['index', 'groups'], None
+
+
+def group_scope(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True).first()
+    if group_id is None:
+        return None
+    return [f'group:{group_id}'], Post.objects.filter(
+        group_id=group_id).aggregate(last=Max('pub_date'))['last']
+
+
+def profile_scope(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True).first()
+    if author_id is None:
+        return None
+    return [f'author:{author_id}'], Post.objects.filter(
+        author_id=author_id).aggregate(last=Max('pub_date'))['last']
+
+
+def post_scope(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'pub_date').first()
+    if post is None:
+        return None
+    author_id, pub_date = post
+    return [f'post:{post_id}', f'author:{author_id}'], pub_date
+
+
+def version(request, scope_func, *args, **kwargs):
+    """Момент последнего изменения областей и дата их последнего поста.
+
+    None, если объекта страницы нет.
+    """
+    scope = scope_func(request, *args, **kwargs)
+    if scope is None:
+        return None
+    scopes, last_post = scope
+    return max(stamps([SITE_SCOPE] + scopes)), last_post
+
+
+def validators(request, scope_func, *args, **kwargs):
+    """ETag и Last-Modified страницы, считаются один раз на запрос."""
+    if not hasattr(request, '_freshness'):
+        # Валидаторы — всегда по default: отметки в кэше свежие, и дата
+        # последнего поста не должна отставать от них вместе с репликой.
+        with use_replica(None):
+            current = version(request, scope_func, *args, **kwargs)
+        request._changed = current and current[0]
+        if current is None:
+            request._freshness = (None, None)
+            return request._freshness
+        changed, last_post = current
+        last_modified = datetime.fromtimestamp(changed, tz=timezone.utc)
+        if last_post is not None:
+            last_modified = max(last_modified, last_post)
+        viewer = request.user.pk if request.user.is_authenticated else ''
+        etag = hashlib.md5(
+            f'{viewer}|{request.get_full_path()}|{changed}|{last_post}'
+            .encode()
+        ).hexdigest()
+        request._freshness = (etag, last_modified)
+    return request._freshness
+
+
+def conditional_page(scope_func):
+    """Отвечает 304 до запроса страницы и рендера шаблона."""
+    def etag(request, *args, **kwargs):
+        return validators(request, scope_func, *args, **kwargs)[0]
+
+    def last_modified(request, *args, **kwargs):
+        return validators(request, scope_func, *args, **kwargs)[1]
+
+    def decorator(view):
+        view = condition(etag_func=etag, last_modified_func=last_modified)(
+            read_fresh(view))
+        return vary_on_cookie(cache_control(no_cache=True)(view))
+    return decorator
+
+
+def read_fresh(view):
+    """Читает страницу из default, пока реплика не получила её изменение.
+
+    Иначе старая копия уйдёт под новым ETag, и после синхронизации
+    клиенты так и будут получать на неё 304.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = current_replica()
+        changed = getattr(request, '_changed', None)
+        if alias and changed and changed >= synced_at(alias):
+            with use_replica(None):
+                return view(request, *args, **kwargs)
+        return view(request, *args, **kwargs)
+    return wrapper
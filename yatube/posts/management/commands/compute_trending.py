@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг «популярное сейчас» сайта и групп; '
+            'запускать по расписанию (cron), например раз в 10 минут')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        groups = trending.compute()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для сайта и {groups} групп за '
+            f'{time.perf_counter() - start:.1f} с'
+        ))
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (
+    EXPORT_CHUNK_SIZE, FORMATS, detect_format, export_rows, open_text,
+    parse_bound, serialize_rows
+)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты с автором и группой в CSV или JSONL, '
+            'потоком и с памятью, не зависящей от размера таблицы')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='файл .csv или .jsonl; с .gz будет сжат gzip')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--since', help='посты не раньше этой даты')
+        parser.add_argument('--until', help='посты раньше этой даты')
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or detect_format(path)
+            bounds = {
+                key: parse_bound(options[key])
+                for key in ('since', 'until') if options[key]
+            }
+        except ValueError as exc:
+            raise CommandError(exc)
+        rows = export_rows(chunk_size=options['chunk_size'], **bounds)
+        self.exported = 0
+        start = time.perf_counter()
+        with open_text(path, 'w') as output:
+            output.writelines(serialize_rows(self.counted(rows), fmt))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Выгружено {self.exported} постов за {elapsed:.1f} с'
+        ))
+
+    def counted(self, rows):
+        for self.exported, row in enumerate(rows, 1):
+            yield row
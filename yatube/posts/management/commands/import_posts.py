@@ -0,0 +1,148 @@
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from core.writes import with_retry
+from posts.models import Group, ImportCheckpoint, Post, User
+from posts.transfer import (
+    FORMATS, after_import, detect_format, keep_pub_date, open_text,
+    parse_pub_date, read_rows
+)
+
+
+class Command(BaseCommand):
+    help = ('Импортирует посты из CSV или JSONL, создавая недостающих '
+            'авторов и группы; после обрыва продолжает с места остановки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл .csv или .jsonl, можно .gz')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--restart', action='store_true',
+                            help='начать заново, забыв сохранённый прогресс')
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='не пересчитывать счётчики, поиск и ленты')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            fmt = options['format'] or detect_format(path)
+        except ValueError as exc:
+            raise CommandError(exc)
+        checkpoint = self.checkpoint(path, options['restart'])
+        if checkpoint.rows:
+            self.stdout.write(f'Продолжаем со строки {checkpoint.rows + 1}')
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        imported = skipped = 0
+        start = time.perf_counter()
+        with open_text(path, 'r') as stream, keep_pub_date():
+            rows = islice(read_rows(stream, fmt), checkpoint.rows, None)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                clean = [row for row in batch if self.clean_row(row)]
+                position = checkpoint.rows + len(batch)
+                authors, groups = with_retry(
+                    self.write_batch, checkpoint.pk, position, clean)
+                # Пачка закоммичена: теперь можно помнить её строки.
+                checkpoint.rows = position
+                self.authors.update(authors)
+                self.groups.update(groups)
+                skipped += len(batch) - len(clean)
+                imported += len(clean)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{checkpoint.rows} строк, {imported / elapsed:.0f} '
+                    f'постов/с'
+                )
+        if not options['skip_rebuild']:
+            after_import(checkpoint.last_post_id)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {imported} постов за {elapsed:.1f} с '
+            f'({imported / elapsed if elapsed else 0:.0f} постов/с), '
+            f'пропущено {skipped} строк'
+        ))
+
+    def checkpoint(self, path, restart):
+        source = os.path.abspath(path)
+        if restart:
+            ImportCheckpoint.objects.filter(source=source).delete()
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=source,
+            defaults={'last_post_id': Post.objects.aggregate(
+                last=Max('id'))['last'] or 0},
+        )
+        return checkpoint
+
+    def write_batch(self, checkpoint_pk, position, rows):
+        """Одна транзакция: новые авторы, группы, посты и прогресс.
+
+        Возвращает созданных авторов и группы; вызывающий добавляет их в
+        словари после коммита, чтобы повтор пачки после блокировки не
+        ссылался на откаченные строки.
+        """
+        authors = self.create_missing(
+            User, 'username', self.authors, {row['author'] for row in rows},
+            lambda username: User(
+                username=username, password=make_password(None)),
+        )
+        groups = self.create_missing(
+            Group, 'slug', self.groups,
+            {row['group'] for row in rows if row['group']},
+            lambda slug: Group(slug=slug, **self.group_fields(rows, slug)),
+        )
+        author_ids = {**self.authors, **authors}
+        group_ids = {**self.groups, **groups}
+        Post.objects.bulk_create(
+            Post(
+                text=row['text'],
+                pub_date=row['pub_date'],
+                author_id=author_ids[row['author']],
+                group_id=group_ids.get(row['group']),
+            )
+            for row in rows
+        )
+        ImportCheckpoint.objects.filter(pk=checkpoint_pk).update(
+            rows=position)
+        return authors, groups
+
+    @staticmethod
+    def clean_row(row):
+        if not isinstance(row, dict):
+            return False
+        if not row.get('text') or not row.get('author'):
+            return False
+        if not all(isinstance(row.get(key) or '', str)
+                   for key in ('text', 'author', 'group')):
+            return False
+        try:
+            row['pub_date'] = parse_pub_date(row.get('pub_date'))
+        except (TypeError, ValueError):
+            return False
+        row['group'] = row.get('group') or None
+        return True
+
+    @staticmethod
+    def group_fields(rows, slug):
+        row = next(row for row in rows if row['group'] == slug)
+        return {
+            'title': row.get('group_title') or slug,
+            'description': row.get('group_description') or '',
+        }
+
+    @staticmethod
+    def create_missing(model, key, known, wanted, build):
+        missing = sorted(wanted - known.keys())
+        if not missing:
+            return {}
+        model.objects.bulk_create(build(value) for value in missing)
+        # bulk_create в SQLite не возвращает pk.
+        return dict(model.objects.filter(
+            **{f'{key}__in': missing}).values_list(key, 'id'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_group_stats, roll_group_activity
+from posts.freshness import touch
+
+
+class Command(BaseCommand):
+    help = ('Сдвигает окно активности групп для каталога; запускать раз '
+            'в сутки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='собрать сводки заново по постам')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_group_stats()
+        else:
+            roll_group_activity()
+        touch('groups')
+        self.stdout.write(self.style.SUCCESS('Сводки групп обновлены'))
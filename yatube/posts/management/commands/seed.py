@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from faker import Faker
+
+from core.writes import with_retry
+from posts.models import Group, Post, User
+from posts.transfer import after_import, keep_pub_date, parse_bound
+
+# Доли постов по часам суток: ночью тихо, пик вечером.
+HOUR_WEIGHTS = (
+    2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 8, 8,
+    9, 9, 8, 8, 8, 9, 10, 11, 12, 11, 8, 4,
+)
+SENTENCE_POOL = 5000
+
+
+def zipf_weights(count, skew):
+    """Вес ранга r — 1 / r**skew: немного тяжёлых, длинный хвост."""
+    return [1 / (rank + 1) ** skew for rank in range(count)]
+
+
+def pub_dates(rnd, count, end, days):
+    """Даты за `days` дней до `end`, по часам — как в HOUR_WEIGHTS.
+
+    Плотность растёт линейно к концу периода: сайт со временем растёт.
+    """
+    hours = rnd.choices(range(24), HOUR_WEIGHTS, k=count)
+    for hour in hours:
+        # Корень из равномерного даёт линейно растущую плотность.
+        day = int(days * rnd.random() ** 0.5)
+        yield end - timedelta(days=days - day) + timedelta(
+            hours=hour, seconds=rnd.randrange(3600))
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу пользователями, группами и постами с '
+            'реалистичным перекосом; результат зависит только от --seed')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='показатель закона Ципфа для авторов и групп')
+        parser.add_argument('--ungrouped', type=float, default=0.3,
+                            help='доля постов без группы')
+        parser.add_argument('--days', type=int, default=3 * 365)
+        parser.add_argument('--end', default='2024-01-01',
+                            help='дата последнего поста; фиксирована, чтобы '
+                                 'прогоны совпадали')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password',
+                            help='общий пароль пользователей, иначе вход '
+                                 'паролем невозможен')
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='не пересчитывать счётчики, поиск и ленты')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['groups'] < 1:
+            raise CommandError('Нужны хотя бы один пользователь и группа')
+        try:
+            end = parse_bound(options['end'])
+        except ValueError as exc:
+            raise CommandError(exc)
+        rnd = random.Random(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        fake_latin = Faker('en_US')
+        fake_latin.seed_instance(options['seed'])
+        start = time.perf_counter()
+        last_post_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        author_ids = self.create_users(fake, fake_latin, options)
+        group_ids = self.create_groups(fake, fake_latin, options['groups'])
+        sentences = [fake.sentence() for _ in range(SENTENCE_POOL)]
+        self.create_posts(rnd, sentences, author_ids, group_ids, end, options)
+        if not options['skip_rebuild']:
+            after_import(last_post_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {len(author_ids)} пользователей, {len(group_ids)} '
+            f'групп и {options["posts"]} постов за '
+            f'{time.perf_counter() - start:.1f} с'
+        ))
+
+    def create_users(self, fake, fake_latin, options):
+        password = make_password(options['password'])
+        users = [
+            User(
+                username=f'{fake_latin.user_name()}{number}',
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=password,
+            )
+            for number in range(options['users'])
+        ]
+        # Повторный запуск с тем же --seed не создаёт дубликатов.
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        ids = dict(User.objects.values_list('username', 'id'))
+        return [ids[user.username] for user in users]
+
+    def create_groups(self, fake, fake_latin, count):
+        groups = [
+            Group(
+                title=fake.catch_phrase()[:200],
+                slug=f'{fake_latin.slug()}-{number}'[:100],
+                description=fake.text(max_nb_chars=400),
+            )
+            for number in range(count)
+        ]
+        Group.objects.bulk_create(groups, ignore_conflicts=True)
+        ids = dict(Group.objects.values_list('slug', 'id'))
+        return [ids[group.slug] for group in groups]
+
+    def create_posts(self, rnd, sentences, author_ids, group_ids, end,
+                     options):
+        total = options['posts']
+        # Тяжёлые авторы и группы — случайные, а не первые по id.
+        author_weights = zipf_weights(len(author_ids), options['skew'])
+        rnd.shuffle(author_weights)
+        group_weights = zipf_weights(len(group_ids), options['skew'])
+        rnd.shuffle(group_weights)
+        ungrouped = options['ungrouped']
+        scale = (1 - ungrouped) / sum(group_weights)
+        group_weights = [
+            weight * scale for weight in group_weights
+        ] + [ungrouped]
+        dates = pub_dates(rnd, total, end, options['days'])
+        created = 0
+        started = time.perf_counter()
+        with keep_pub_date():
+            while created < total:
+                size = min(options['batch_size'], total - created)
+                authors = rnd.choices(author_ids, author_weights, k=size)
+                groups = rnd.choices(group_ids + [None], group_weights,
+                                     k=size)
+                posts = [
+                    Post(
+                        text=' '.join(rnd.choices(
+                            sentences, k=rnd.randint(1, 5))),
+                        pub_date=next(dates),
+                        author_id=author,
+                        group_id=group,
+                    )
+                    for author, group in zip(authors, groups)
+                ]
+                with_retry(Post.objects.bulk_create, posts)
+                created += size
+                rate = created / (time.perf_counter() - started)
+                self.stdout.write(f'{created} постов, {rate:.0f} в секунду')
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=500, unique=True, verbose_name='Источник')),
+                ('rows', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('last_post_id', models.PositiveIntegerField(default=0, verbose_name='id последнего поста до импорта')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлён')),
+            ],
+            options={
+                'verbose_name': 'Прогресс импорта',
+                'verbose_name_plural': 'Прогресс импортов',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:58
+
+from django.db import migrations, models
+import posts.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Картинка к посту', upload_to=posts.models.image_path, verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 2.2.16 on 2026-10-18 07:07
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupActivity = apps.get_model('posts', 'GroupActivity')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    start = timezone.localdate() - timedelta(
+        days=settings.GROUP_ACTIVITY_DAYS - 1)
+    days = list(
+        Post.objects.filter(
+            group__isnull=False,
+            pub_date__gte=timezone.make_aware(datetime.combine(start, time())),
+        )
+        .annotate(day=TruncDate('pub_date'))
+        .order_by()
+        .values_list('group', 'day')
+        .annotate(total=models.Count('pk'))
+    )
+    GroupActivity.objects.bulk_create(
+        GroupActivity(group_id=group_id, day=day, posts_count=total)
+        for group_id, day, total in days
+    )
+    week_posts = {}
+    for group_id, _, total in days:
+        week_posts[group_id] = week_posts.get(group_id, 0) + total
+    last_posts = Post.objects.filter(group=models.OuterRef('pk')).order_by(
+        '-pub_date').values('pub_date')[:1]
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=group_id,
+            last_post=last_post,
+            week_posts=week_posts.get(group_id, 0),
+        )
+        for group_id, last_post in Group.objects.annotate(
+            last_post=models.Subquery(last_posts)
+        ).values_list('pk', 'last_post')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+            options={
+                'verbose_name': 'Активность группы',
+                'verbose_name_plural': 'Активность групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последний пост')),
+                ('week_posts', models.PositiveIntegerField(default=0, verbose_name='Постов за неделю')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['week_posts'], name='groupstats_week_posts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['last_post'], name='groupstats_last_post_idx'),
+        ),
+        migrations.AddField(
+            model_name='groupactivity',
+            name='group',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupactivity',
+            constraint=models.UniqueConstraint(fields=('group', 'day'), name='unique_group_activity_day'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
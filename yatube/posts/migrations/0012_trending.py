@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 07:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_group_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('group', models.ForeignKey(blank=True, help_text='Пусто — рейтинг всего сайта', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Group', verbose_name='Группа')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingpost',
+            index=models.Index(fields=['group', 'rank'], name='trending_group_rank_idx'),
+        ),
+    ]
@@ -1,9 +1,23 @@
+import hashlib
+import os
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+def image_path(instance, filename):
+    """Путь картинки по SHA-256 её содержимого: одинаковые файлы
+    хранятся один раз, а имя можно кэшировать навсегда."""
+    digest = hashlib.sha256()
+    for chunk in instance.image.chunks():
+        digest.update(chunk)
+    name = digest.hexdigest()
+    extension = os.path.splitext(filename)[1].lower()
+    return f'posts/{name[:2]}/{name[2:]}{extension}'
+
+
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Введите текст поста')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
@@ -20,6 +34,22 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост'
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to=image_path,
+        blank=True,
+        help_text='Картинка к посту'
+    )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.text[:15]
@@ -27,12 +57,224 @@ class Post(models.Model):
     class Meta:
         ordering = ['-pub_date']
         default_related_name = 'posts'
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'], name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+        ]
 
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, max_length=100)
     description = models.TextField(max_length=400)
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class GroupStats(models.Model):
+    """Сводка группы для каталога: число постов — в Group.posts_count."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    last_post = models.DateTimeField('Последний пост', null=True, blank=True)
+    week_posts = models.PositiveIntegerField(
+        'Постов за неделю',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.group}: {self.week_posts}'
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+        indexes = [
+            models.Index(
+                fields=['week_posts'], name='groupstats_week_posts_idx'
+            ),
+            models.Index(
+                fields=['last_post'], name='groupstats_last_post_idx'
+            ),
+        ]
+
+
+class GroupActivity(models.Model):
+    """Число постов группы за день; хранятся последние
+    GROUP_ACTIVITY_DAYS дней."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='activity',
+        verbose_name='Группа'
+    )
+    day = models.DateField('День')
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Активность группы'
+        verbose_name_plural = 'Активность групп'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'day'], name='unique_group_activity_day'
+            ),
+        ]
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following',
+        verbose_name='Автор'
+    )
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'pub_date'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+
+
+class TrendingPost(models.Model):
+    """Место поста в рейтинге «популярное сейчас».
+
+    Рейтинг пересчитывает manage.py compute_trending, страницы только
+    читают готовые строки.
+    """
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Группа',
+        help_text='Пусто — рейтинг всего сайта'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Пост'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Оценка')
+
+    def __str__(self):
+        return f'{self.group or "сайт"}: {self.rank}. {self.post}'
+
+    class Meta:
+        ordering = ['rank']
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+        indexes = [
+            models.Index(
+                fields=['group', 'rank'], name='trending_group_rank_idx'
+            ),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    source = models.CharField('Источник', max_length=500, unique=True)
+    rows = models.PositiveIntegerField('Обработано строк', default=0)
+    last_post_id = models.PositiveIntegerField(
+        'id последнего поста до импорта',
+        default=0
+    )
+    updated = models.DateTimeField('Обновлён', auto_now=True)
+
+    def __str__(self):
+        return f'{self.source}: {self.rows}'
+
+    class Meta:
+        verbose_name = 'Прогресс импорта'
+        verbose_name_plural = 'Прогресс импортов'
@@ -0,0 +1,102 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from core.paginators import KeysetPage, decode_cursor, encode_cursor
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки, поэтому операторы и скобки из ввода
+    не попадают в синтаксис FTS5; слова объединяются через AND.
+    """
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def index_post(post_id, text):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post_id, text]
+        )
+
+
+def unindex_post(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild_index():
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) "
+                       "VALUES ('optimize')")
+
+
+def matching_ids(query):
+    return RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(query)]
+    )
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+def search_posts(query, per_page, after=None):
+    """Страница результатов по релевантности с курсором ?after=."""
+    expression = match_expression(query)
+    if not expression:
+        return KeysetPage([], None)
+    sql = (
+        f"SELECT rowid, rank, snippet({FTS_TABLE}, 0, %s, %s, '…', 24) "
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [MARK_START, MARK_END, expression]
+    if after:
+        try:
+            rank, post_id = decode_cursor(after)
+            params += [float(rank), float(rank), int(post_id)]
+        except (TypeError, ValueError):
+            pass
+        else:
+            sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(per_page + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [post_id for post_id, _, _ in rows]
+    )
+    results = []
+    for post_id, _, snippet in rows:
+        if post_id in posts:
+            post = posts[post_id]
+            post.snippet = highlight(snippet)
+            results.append(post)
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
+    return KeysetPage(results, None, next_cursor=next_cursor)
@@ -0,0 +1,147 @@
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from . import tasks
+from .counters import bump_author, bump_group, bump_group_stats
+from .freshness import SITE_SCOPE, post_scopes, touch
+from .models import Group, GroupStats, Post, User
+
+USER_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, **kwargs):
+    instance._previous_group_id = instance._previous_image = None
+    if not instance._state.adding:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image')
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        bump_author(instance.author_id, 1)
+        bump_group(instance.group_id, 1)
+        bump_group_stats(instance.group_id, instance.pub_date, 1)
+    elif instance._previous_group_id != instance.group_id:
+        bump_group(instance._previous_group_id, -1)
+        bump_group(instance.group_id, 1)
+        bump_group_stats(
+            instance._previous_group_id, instance.pub_date, -1)
+        bump_group_stats(instance.group_id, instance.pub_date, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    # При удалении группы посты получают group=NULL через UPDATE без
+    # сигналов, а счётчик группы удаляется вместе с её строкой.
+    bump_author(instance.author_id, -1)
+    bump_group(instance.group_id, -1)
+    bump_group_stats(instance.group_id, instance.pub_date, -1)
+
+
+@receiver(pre_save, sender=Post)
+def bump_post_version(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance.version += 1
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    # Каталог читает GroupStats, поэтому строка нужна и пустой группе.
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_name(sender, instance, update_fields=None, **kwargs):
+    # Карточки и страницы показывают только имя автора: смена пароля,
+    # почты или входа не должна переписывать все его посты.
+    instance._name_changed = False
+    if instance._state.adding:
+        return
+    if update_fields and not set(update_fields) & set(USER_NAME_FIELDS):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list(
+        *USER_NAME_FIELDS).first()
+    instance._name_changed = previous != tuple(
+        getattr(instance, field) for field in USER_NAME_FIELDS)
+
+
+@receiver(post_save, sender=User)
+def bump_author_posts_versions(sender, instance, **kwargs):
+    if getattr(instance, '_name_changed', False):
+        Post.objects.filter(author=instance).update(
+            version=F('version') + 1)
+
+
+@receiver(post_save, sender=Group)
+def bump_group_posts_versions(sender, instance, created, **kwargs):
+    if not created:
+        instance.posts.update(version=F('version') + 1)
+
+
+@receiver(pre_delete, sender=Group)
+def bump_orphaned_posts_versions(sender, instance, **kwargs):
+    # Сразу после сигнала посты группы получат group=NULL
+    instance.posts.update(version=F('version') + 1)
+
+
+# Счётчики, версии и метки свежести обновляются на месте: это по одному
+# UPDATE, и следующая же страница автора должна их увидеть. Поиск и ленты
+# подписчиков ждут очереди jobs.
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def index_changed_post(sender, instance, **kwargs):
+    enqueue(tasks.index_post, instance.pk, key=f'index_post:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+def thumbnail_saved_image(sender, instance, **kwargs):
+    # Без миниатюр пост мог остаться, если его сохранили поверх
+    # результата задачи — например, правкой, открытой до её окончания.
+    if instance.image and (instance.image.name != instance._previous_image
+                           or not instance.thumbnails):
+        enqueue(tasks.make_thumbnails, instance.pk,
+                key=f'make_thumbnails:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+def touch_saved_post(sender, instance, **kwargs):
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    touch(
+        *post_scopes(instance),
+        f'group:{previous_group_id}' if previous_group_id else None
+    )
+
+
+@receiver(post_delete, sender=Post)
+def touch_deleted_post(sender, instance, **kwargs):
+    touch(*post_scopes(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def touch_site(sender, instance, **kwargs):
+    touch(SITE_SCOPE)
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_author(sender, instance, **kwargs):
+    # Новый пользователь без постов не виден ни на одной странице.
+    if getattr(instance, '_name_changed', False):
+        touch(SITE_SCOPE)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_created_post(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.fan_out, instance.pk, key=f'fan_out:{instance.pk}')
@@ -0,0 +1,100 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import F
+
+from core.writes import write
+from jobs.queue import enqueue, task
+
+from . import search, thumbnails, timeline
+from .counters import bump_group, move_group_stats
+from .freshness import post_scopes, touch
+from .models import Follow, Post
+
+
+@task
+def index_post(post_id):
+    """Приводит запись поискового индекса к текущему тексту поста."""
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True).first()
+    if text is None:
+        write(search.unindex_post, post_id)
+    else:
+        write(search.index_post, post_id, text)
+
+
+@task
+def fan_out(post_id):
+    timeline.fan_out(post_id)
+
+
+@task
+def sync_follow(user_id, author_id):
+    """Приводит ленту к подписке: подписка и отписка подряд дадут одну
+    задачу, и выполнится то, что верно на момент запуска."""
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        timeline.backfill(user_id, author_id)
+    else:
+        timeline.drop(user_id, author_id)
+
+
+@task
+def make_thumbnails(post_id):
+    """Готовит миниатюры картинки поста и обновляет его карточки."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    prepared = thumbnails.generate(post.image)
+    # Карточки в кэше собраны без миниатюр — новая версия их заменит.
+    # Картинку могли заменить, пока шла задача: тогда её ждёт своя задача.
+    write(Post.objects.filter(pk=post_id, image=post.image.name).update,
+          thumbnails=prepared, version=F('version') + 1)
+    touch(*post_scopes(post))
+
+
+def _move_posts(post_ids, group_id):
+    posts = Post.objects.filter(pk__in=post_ids).exclude(group_id=group_id)
+    moved = list(posts.values_list('pk', 'author_id', 'group_id', 'pub_date'))
+    posts.update(group_id=group_id, version=F('version') + 1)
+    # UPDATE идёт мимо сигналов: счётчики и сводки групп правим сами.
+    for previous_group_id, count in Counter(
+            previous for _, _, previous, _ in moved).items():
+        bump_group(previous_group_id, -count)
+    bump_group(group_id, len(moved))
+    if moved:
+        move_group_stats(
+            [(previous, pub_date) for _, _, previous, pub_date in moved],
+            group_id
+        )
+    return moved
+
+
+@task
+def move_posts(post_ids, group_id):
+    """Переносит пачку постов в группу (None — убирает из групп)."""
+    moved = write(_move_posts, post_ids, group_id)
+    scopes = {f'group:{group_id}'} if moved and group_id else set()
+    for pk, author_id, previous_group_id, _ in moved:
+        scopes.update(post_scopes(Post(
+            pk=pk, author_id=author_id, group_id=previous_group_id)))
+    touch(*scopes)
+
+
+@task
+def delete_author_posts(author_id):
+    """Удаляет посты автора пачками, каждая — своя транзакция и задача.
+
+    Удаление идёт через ORM, поэтому сигналы поправят счётчики, поиск и
+    ленты, как при удалении по одному.
+    """
+    post_ids = list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('pk')
+        .values_list('pk', flat=True)[:settings.ADMIN_BULK_CHUNK_SIZE]
+    )
+    if not post_ids:
+        return
+    write(Post.objects.filter(pk__in=post_ids).delete)
+    if len(post_ids) == settings.ADMIN_BULK_CHUNK_SIZE:
+        enqueue(delete_author_posts, author_id,
+                key=f'delete_author_posts:{author_id}')
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, size):
+    """Готовая миниатюра размера size из POST_THUMBNAILS или None."""
+    return thumbnails.find(post, size)
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.queue import run_pending
+from posts.models import AuthorStats, Group, Post, User
+from posts.transfer import keep_pub_date
+
+CHANGELIST = reverse('admin:posts_post_changelist')
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.old_group = Group.objects.create(
+            title='Старая группа', slug='old', description='Описание')
+        cls.new_group = Group.objects.create(
+            title='Новая группа', slug='new', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count, author=None, group=None, year=2021):
+        with keep_pub_date():
+            for number in range(count):
+                Post.objects.create(
+                    text=f'Пост {number}',
+                    author=author or self.author,
+                    group=group,
+                    pub_date=datetime(year, 6, 1 + number % 28,
+                                      tzinfo=timezone.utc),
+                )
+        run_pending()
+
+    def changelist_queries(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(CHANGELIST, params or {})
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries]
+
+    def test_changelist_queries_do_not_grow(self):
+        """Запросов списка постов не больше на полной странице"""
+        self.create_posts(2, group=self.old_group)
+        self.changelist_queries()
+        few = len(self.changelist_queries())
+        self.create_posts(40, group=self.old_group)
+        self.assertEqual(len(self.changelist_queries()), few)
+
+    def test_changelist_count_is_cached(self):
+        """Число постов считается один раз, полного COUNT(*) нет"""
+        self.create_posts(3)
+        self.changelist_queries()
+        queries = self.changelist_queries()
+        self.assertFalse([sql for sql in queries if 'COUNT(' in sql])
+
+    def test_search_without_words(self):
+        """Поиск из одних знаков препинания отдаёт пустой список"""
+        self.create_posts(2)
+        response = self.client.get(CHANGELIST, {'q': '!!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_date_hierarchy_without_distinct(self):
+        """Годы в date_hierarchy строятся без DISTINCT по таблице"""
+        self.create_posts(1, year=2019)
+        self.create_posts(1, year=2021)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(CHANGELIST)
+        self.assertContains(response, 'pub_date__year=2020')
+        self.assertFalse([
+            query for query in queries if 'DISTINCT' in query['sql']
+        ])
+        response = self.client.get(CHANGELIST, {'pub_date__year': 2021})
+        self.assertContains(response, 'pub_date__month=6')
+
+    def test_move_to_group(self):
+        """Перенос в группу идёт задачами и правит счётчики групп"""
+        self.create_posts(5, group=self.old_group)
+        selected = list(Post.objects.values_list('pk', flat=True)[:3])
+        data = {'action': 'move_to_group', '_selected_action': selected}
+        response = self.client.post(CHANGELIST, data)
+        self.assertContains(response, 'name="group"')
+        with override_settings(ADMIN_BULK_CHUNK_SIZE=2):
+            self.client.post(CHANGELIST, {
+                **data, 'index': 0, 'post': 'yes',
+                'group': self.new_group.pk,
+            })
+            self.assertEqual(run_pending(), 2)
+        self.assertEqual(
+            set(self.new_group.posts.values_list('pk', flat=True)),
+            set(selected)
+        )
+        self.old_group.refresh_from_db()
+        self.new_group.refresh_from_db()
+        self.assertEqual(self.old_group.posts_count, 2)
+        self.assertEqual(self.new_group.posts_count, 3)
+
+    def test_delete_author_posts(self):
+        """Удаляются все посты автора выбранного поста, пачками"""
+        self.create_posts(5)
+        self.create_posts(2, author=self.other)
+        selected = Post.objects.filter(author=self.author).first()
+        data = {'action': 'delete_author_posts',
+                '_selected_action': [selected.pk]}
+        response = self.client.post(CHANGELIST, data)
+        self.assertContains(response, 'author: 5')
+        self.assertEqual(Post.objects.count(), 7)
+        with override_settings(ADMIN_BULK_CHUNK_SIZE=2):
+            self.client.post(CHANGELIST, {**data, 'index': 0, 'post': 'yes'})
+            run_pending()
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).posts_count, 0)
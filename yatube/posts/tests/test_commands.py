@@ -0,0 +1,176 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, ImportCheckpoint, Post, User
+from posts.search import search_posts
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.author = User.objects.create_user(username='old_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def write_csv(self, rows):
+        path = os.path.join(self.directory, 'posts.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            writer = csv.DictWriter(output, fieldnames=[
+                'text', 'pub_date', 'author', 'group', 'group_title'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def import_posts(self, path, *args):
+        call_command('import_posts', path, *args, stdout=StringIO())
+
+    def test_import_creates_authors_groups_and_posts(self):
+        """Импорт создаёт авторов, группы и посты с датами источника"""
+        path = self.write_csv([
+            {'text': 'Старый пост', 'pub_date': '2015-03-01T10:00:00+00:00',
+             'author': 'old_author', 'group': 'archive',
+             'group_title': 'Архив'},
+            {'text': 'Новый автор', 'pub_date': '2016-01-01T00:00:00',
+             'author': 'newcomer', 'group': ''},
+            {'text': '', 'author': 'old_author'},
+        ])
+        self.import_posts(path, '--batch-size', '2')
+        post = Post.objects.get(text='Старый пост')
+        self.assertEqual(post.author, self.author)
+        self.assertEqual(post.group.title, 'Архив')
+        self.assertEqual(post.pub_date,
+                         datetime(2015, 3, 1, 10, tzinfo=timezone.utc))
+        self.assertTrue(User.objects.filter(username='newcomer').exists())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            ImportCheckpoint.objects.get(source=path).rows, 3)
+        # Счётчики и поиск пересчитаны после импорта.
+        self.assertEqual(Group.objects.get(slug='archive').posts_count, 1)
+        self.assertEqual(User.objects.get(
+            username='old_author').stats.posts_count, 1)
+        self.assertEqual(list(search_posts('старый', 10)), [post])
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск продолжает после сохранённой строки"""
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as output:
+            for number in range(3):
+                output.write(json.dumps(
+                    {'text': f'Пост {number}', 'author': 'old_author'}
+                ) + '\n')
+        ImportCheckpoint.objects.create(source=path, rows=2)
+        self.import_posts(path)
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Пост 2'])
+        self.import_posts(path)
+        self.assertEqual(Post.objects.count(), 1)
+        self.import_posts(path, '--restart')
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_import_skips_malformed_lines(self):
+        """Битые строки JSONL и строки не с объектом пропускаются"""
+        path = os.path.join(self.directory, 'broken.jsonl')
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write('{"text": "Целый пост", "author": "old_author"}\n')
+            output.write('{"text": "Оборванный\n')
+            output.write('["text", "author"]\n')
+            output.write('{"text": "Дата", "author": "auth", "pub_date": 1}\n')
+            output.write('{"text": "Автор", "author": ["old_author"]}\n')
+        stdout = StringIO()
+        call_command('import_posts', path, stdout=stdout)
+        self.assertEqual(list(Post.objects.values_list('text', flat=True)),
+                         ['Целый пост'])
+        self.assertIn('пропущено 4 строк', stdout.getvalue())
+        self.assertEqual(ImportCheckpoint.objects.get(source=path).rows, 5)
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.author = User.objects.create_user(username='exporter')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        for year, group in ((2019, cls.group), (2020, None), (2021, None)):
+            post = Post.objects.create(
+                author=cls.author, text=f'Пост {year}', group=group)
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=datetime(year, 6, 1, tzinfo=timezone.utc))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_export_compressed_jsonl_in_range(self):
+        """Экспорт пишет сжатый JSONL постов из периода"""
+        path = os.path.join(self.directory, 'dump.jsonl.gz')
+        call_command('export_posts', path, '--until', '2020-12-31',
+                     '--chunk-size', '1', stdout=StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as dump:
+            rows = [json.loads(line) for line in dump]
+        self.assertEqual(rows, [
+            {'text': 'Пост 2019', 'pub_date': '2019-06-01T00:00:00+00:00',
+             'author': 'exporter', 'group': 'test_slug'},
+            {'text': 'Пост 2020', 'pub_date': '2020-06-01T00:00:00+00:00',
+             'author': 'exporter', 'group': None},
+        ])
+
+    def test_admin_action_streams_csv(self):
+        """Действие админки отдаёт выбранные посты сжатым CSV"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        client = Client()
+        client.force_login(admin)
+        selected = Post.objects.filter(pub_date__year=2021)
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [post.pk for post in selected],
+        })
+        self.assertTrue(response.streaming)
+        content = gzip.decompress(b''.join(response.streaming_content))
+        rows = list(csv.reader(content.decode().splitlines()))
+        self.assertEqual(rows, [
+            ['text', 'pub_date', 'author', 'group'],
+            ['Пост 2021', '2021-06-01T00:00:00+00:00', 'exporter', ''],
+        ])
+
+
+class SeedTest(TestCase):
+    def seed(self):
+        call_command('seed', '--users', '5', '--groups', '2', '--posts',
+                     '40', '--seed', '7', '--batch-size', '15',
+                     stdout=StringIO())
+        return list(Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'))
+
+    def test_seed_is_deterministic(self):
+        """Один и тот же --seed даёт одни и те же данные"""
+        first = self.seed()
+        self.assertEqual(len(first), 40)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(
+            sum(Group.objects.values_list('posts_count', flat=True)),
+            Post.objects.exclude(group=None).count()
+        )
+        Post.objects.all().delete()
+        self.assertEqual(self.seed(), first)
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост в группе')
+        cls.other_post = Post.objects.create(
+            author=cls.other, text='Пост без группы')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_list_scope_posts(self):
+        """Ленты сайта, группы и автора содержат только свои посты"""
+        feeds = {
+            ('posts:feed', ()): [self.post, self.other_post],
+            ('posts:group_feed', (self.group.slug,)): [self.post],
+            ('posts:profile_feed', (self.other.username,)): [
+                self.other_post],
+        }
+        for (name, args), expected in feeds.items():
+            for suffix, content_type in (
+                ('', 'application/rss+xml'),
+                ('_atom', 'application/atom+xml'),
+            ):
+                with self.subTest(name=name + suffix):
+                    response = self.client.get(reverse(name + suffix,
+                                                       args=args))
+                    self.assertTrue(
+                        response['Content-Type'].startswith(content_type))
+                    for post in (self.post, self.other_post):
+                        if post in expected:
+                            self.assertContains(response, post.text)
+                        else:
+                            self.assertNotContains(response, post.text)
+
+    @override_settings(FEED_POSTS=1)
+    def test_feed_capped(self):
+        """В ленте не больше FEED_POSTS свежих постов"""
+        response = self.client.get(reverse('posts:feed'))
+        self.assertContains(response, self.other_post.text)
+        self.assertNotContains(response, self.post.text)
+
+    def test_feed_cached_until_change(self):
+        """Лента берётся из кэша и отвечает 304, пока в области нет новых
+        постов"""
+        url = reverse('posts:profile_feed', args=(self.author.username,))
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост автора')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост автора')
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы — 404"""
+        response = self.client.get(reverse('posts:group_feed',
+                                           args=('missing',)))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.counters import activity_start, rebuild_group_stats
+from posts.models import Group, GroupActivity, GroupStats, Post, User
+from posts.transfer import keep_pub_date
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.quiet = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='Описание')
+        cls.busy = Group.objects.create(
+            title='Активная группа', slug='busy', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+
+    def create_post(self, group, days_ago=0):
+        with keep_pub_date():
+            return Post.objects.create(
+                text='Пост', author=self.user, group=group,
+                pub_date=timezone.now() - timedelta(days=days_ago),
+            )
+
+    def stats(self, group):
+        stats = GroupStats.objects.get(group=group)
+        return stats.week_posts, stats.last_post
+
+    def test_posts_update_stats(self):
+        """Новые, перенесённые и удалённые посты меняют сводку группы"""
+        old = self.create_post(self.quiet, days_ago=30)
+        first = self.create_post(self.busy, days_ago=1)
+        last = self.create_post(self.busy)
+        self.assertEqual(self.stats(self.quiet), (0, old.pub_date))
+        self.assertEqual(self.stats(self.busy), (2, last.pub_date))
+        last.group = self.quiet
+        last.save()
+        self.assertEqual(self.stats(self.quiet), (1, last.pub_date))
+        self.assertEqual(self.stats(self.busy), (1, first.pub_date))
+        first.delete()
+        self.assertEqual(self.stats(self.busy), (0, None))
+
+    def test_rebuild_matches_incremental(self):
+        """Пересборка по постам даёт ту же сводку, что и сигналы"""
+        self.create_post(self.quiet, days_ago=20)
+        self.create_post(self.busy, days_ago=3)
+        self.create_post(self.busy)
+        expected = list(GroupStats.objects.order_by('pk').values_list())
+        activity = list(GroupActivity.objects.order_by(
+            'group', 'day').values_list('group', 'day', 'posts_count'))
+        rebuild_group_stats()
+        self.assertEqual(
+            list(GroupStats.objects.order_by('pk').values_list()), expected)
+        self.assertEqual(list(GroupActivity.objects.order_by(
+            'group', 'day').values_list('group', 'day', 'posts_count')),
+            activity)
+
+    def test_roll_forgets_old_days(self):
+        """Сдвиг окна убирает из активности дни до его начала"""
+        self.create_post(self.busy)
+        GroupActivity.objects.create(
+            group=self.busy, day=activity_start() - timedelta(days=1),
+            posts_count=5)
+        GroupStats.objects.filter(group=self.busy).update(week_posts=6)
+        call_command('roll_group_stats', stdout=StringIO())
+        self.assertEqual(self.stats(self.busy)[0], 1)
+        self.assertEqual(GroupActivity.objects.count(), 1)
+
+    def test_directory_sorted_without_posts(self):
+        """Каталог сортируется по сводке и не читает посты"""
+        self.create_post(self.quiet, days_ago=20)
+        self.create_post(self.busy, days_ago=2)
+        self.create_post(self.busy)
+        url = reverse('posts:groups')
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(url)
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.busy, self.quiet]
+        )
+        self.assertFalse([
+            query for query in queries if 'posts_post' in query['sql']
+        ])
+        response = Client().get(url, {'sort': 'title'})
+        self.assertEqual(
+            [stats.group for stats in response.context['page_obj']],
+            [self.busy, self.quiet]
+        )
+        response = Client().get(url, {'sort': 'recent'})
+        self.assertEqual(response.context['sort'], 'recent')
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts import thumbnails
+from posts.models import Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class PostImageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, text, tail=b''):
+        # Хвост после конца GIF даёт другой файл с той же картинкой.
+        self.client.post(reverse('posts:post_create'), data={
+            'text': text,
+            'image': SimpleUploadedFile(
+                'small.gif', SMALL_GIF + tail, 'image/gif'),
+        })
+        return Post.objects.get(text=text)
+
+    def test_image_stored_by_content(self):
+        """Картинка хранится по хэшу содержимого, одна копия на содержимое"""
+        first = self.create_post('Первый пост')
+        second = self.create_post('Второй пост')
+        self.assertRegex(first.image.name,
+                         r'^posts/[0-9a-f]{2}/[0-9a-f]{62}\.gif$')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(
+            os.listdir(os.path.dirname(first.image.path)),
+            [os.path.basename(first.image.name)],
+        )
+
+    def test_pages_do_not_resize(self):
+        """Пока задача не выполнена, страницы не создают миниатюр"""
+        post = self.create_post('Пост с картинкой')
+        self.assertTrue(Job.objects.filter(
+            key=f'make_thumbnails:{post.pk}').exists())
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'card-img')
+        self.assertIsNone(thumbnails.find(post, 'card'))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.media_root, 'cache')))
+
+    def test_thumbnails_on_pages(self):
+        """Готовые миниатюры попадают в карточку и на страницу поста"""
+        post = self.create_post('Пост с миниатюрой')
+        self.client.get(reverse('posts:index'))
+        run_pending()
+        post.refresh_from_db()
+        card = thumbnails.find(post, 'card')
+        detail = thumbnails.find(post, 'detail')
+        self.assertEqual((card.width, card.height), (960, 339))
+        self.assertContains(self.client.get(reverse('posts:index')),
+                            card.url)
+        self.assertContains(
+            self.client.get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})),
+            detail.url,
+        )
+
+    def test_media_cached_forever(self):
+        """Картинки и миниатюры отдаются с immutable"""
+        post = self.create_post('Пост для кэша')
+        run_pending()
+        post.refresh_from_db()
+        for url in (post.image.url, thumbnails.find(post, 'card').url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('immutable', response['Cache-Control'])
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_cards_within_budget_on_cold_cache(self):
+        """Карточки с миниатюрами не делают запросов на каждый пост"""
+        for number in range(10):
+            self.create_post(f'Пост {number}', tail=bytes([number]))
+        run_pending()
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'card-img', count=10)
+
+    def test_replaced_image_hides_old_thumbnails(self):
+        """После замены картинки старые миниатюры не показываются"""
+        post = self.create_post('Пост с заменой')
+        run_pending()
+        post.refresh_from_db()
+        post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'1', 'image/gif')
+        post.save()
+        self.assertIsNone(thumbnails.find(post, 'card'))
+        run_pending()
+        post.refresh_from_db()
+        self.assertIsNotNone(thumbnails.find(post, 'card'))
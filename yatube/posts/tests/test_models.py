@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post, User
+from posts.models import AuthorStats, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -66,3 +69,66 @@ class GroupModelTest(TestCase):
         group = GroupModelTest.group
         expected_object_name = group.title
         self.assertEqual(str(group), expected_object_name)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='first',
+            description='Тестовое описание',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='second',
+            description='Тестовое описание',
+        )
+
+    def assertCounters(self, author, group, another_group):
+        self.group.refresh_from_db()
+        self.another_group.refresh_from_db()
+        self.assertEqual(AuthorStats.objects.get(author=self.user)
+                         .posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.another_group.posts_count, another_group)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики меняются при создании, переносе и удалении поста"""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group)
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertCounters(2, 1, 0)
+        post.group = self.another_group
+        post.save()
+        self.assertCounters(2, 0, 1)
+        post.text = 'Поправленный пост'
+        post.save()
+        self.assertCounters(2, 0, 1)
+        post.delete()
+        self.assertCounters(1, 0, 0)
+
+    def test_group_delete_keeps_author_counter(self):
+        """Удаление группы не трогает счётчик автора"""
+        group = Group.objects.create(
+            title='Удаляемая группа',
+            slug='removed',
+            description='Тестовое описание',
+        )
+        post = Post.objects.create(author=self.user, text='Пост', group=group)
+        group.delete()
+        post.refresh_from_db()
+        self.assertIsNone(post.group)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.user).posts_count, 1)
+
+    def test_rebuild_counters_command(self):
+        """rebuild_counters восстанавливает счётчики после bulk_create"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {i}', group=self.group)
+            for i in range(3)
+        )
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertCounters(3, 3, 0)
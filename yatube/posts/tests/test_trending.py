@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Follow, Group, Post, TrendingPost, User
+from posts.transfer import keep_pub_date
+
+
+class TrendingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username='star')
+        cls.newbie = User.objects.create_user(username='newbie')
+        for number in range(3):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'fan{number}'),
+                author=cls.star,
+            )
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='-')
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def create_post(self, author, hours_ago, group=None):
+        with keep_pub_date():
+            return Post.objects.create(
+                text=f'Пост {author.username} {hours_ago}',
+                author=author,
+                group=group,
+                pub_date=self.now - timedelta(hours=hours_ago),
+            )
+
+    def test_ranking_order(self):
+        """Свежесть и подписчики автора поднимают пост, старые не попадают"""
+        star = self.create_post(self.star, 5, self.group)
+        fresh = self.create_post(self.newbie, 1)
+        old = self.create_post(self.newbie, 5, self.group)
+        self.create_post(self.star, 24 * 30)
+        trending.compute(self.now)
+        self.assertEqual(trending.ranking(), [star, fresh, old])
+        self.assertEqual(trending.ranking(self.group), [star, old])
+
+    @override_settings(TRENDING_POSTS=1)
+    def test_ranking_keeps_top(self):
+        """В рейтинге не больше TRENDING_POSTS постов"""
+        self.create_post(self.newbie, 3)
+        best = self.create_post(self.newbie, 1)
+        call_command('compute_trending', stdout=StringIO())
+        self.assertEqual(
+            list(TrendingPost.objects.values_list('post', 'rank')),
+            [(best.pk, 1)]
+        )
+
+    def test_index_sidebar_single_query(self):
+        """Главная показывает рейтинг одним запросом"""
+        post = self.create_post(self.star, 1)
+        trending.compute(self.now)
+        with CaptureQueriesContext(connection) as queries:
+            response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.context['popular'], [post])
+        self.assertContains(response, reverse('posts:popular'))
+        self.assertEqual(len([
+            query for query in queries
+            if 'posts_trendingpost' in query['sql']
+        ]), 1)
+
+    def test_popular_pages(self):
+        """Страницы рейтинга сайта и группы"""
+        post = self.create_post(self.star, 1, self.group)
+        trending.compute(self.now)
+        response = Client().get(reverse('posts:popular'))
+        self.assertEqual(response.context['posts'], [post])
+        response = Client().get(
+            reverse('posts:group_popular', args=[self.group.slug]))
+        self.assertEqual(response.context['group'], self.group)
+        self.assertEqual(response.context['posts'], [post])
+        response = Client().get(
+            reverse('posts:group_popular', args=['missing']))
+        self.assertEqual(response.status_code, 404)
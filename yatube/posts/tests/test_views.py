@@ -1,8 +1,15 @@
-from django.test import Client, TestCase
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django import forms
 
-from posts.models import Group, Post, User
+from core.paginators import encode_cursor
+from core.testing import QueryBudgetTestMixin
+from posts import urls as posts_urls
+from posts.models import Follow, Group, Post, User
 
 
 class PostViewTest(TestCase):
@@ -154,6 +161,8 @@ class PaginatorViewsTest(TestCase):
             )
             for i in range(NUMBER_POSTS)
         )
+        # bulk_create не шлёт сигналы, счётчики пересчитываем явно
+        call_command('rebuild_counters', stdout=StringIO())
 
     def setUp(self):
         self.guest_client = Client()
@@ -182,3 +191,376 @@ class PaginatorViewsTest(TestCase):
                     self.assertEqual(len(self.guest_client.get(
                         url + '?page=' + str(page)).context.get('page_obj')),
                         expected_amount)
+
+    def test_huge_page_number_shows_last_page(self):
+        """Номер страницы за пределами INTEGER отдаёт последнюю"""
+        cache.clear()
+        urls = {
+            reverse('posts:index'): 2,
+            reverse('posts:group', kwargs={'slug': self.group.slug}): 2,
+            reverse('posts:profile', kwargs={'username': self.user}): 2,
+            reverse('posts:groups'): 1,
+        }
+        for url, last in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, {'page': 2 ** 63 - 1})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['page_obj'].number, last)
+
+    def test_keyset_pages_walk_forward_and_back(self):
+        """Курсоры ?after=/?before= листают ленты без номеров страниц"""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url + '?after=').context[
+                    'page_obj']
+                self.assertEqual(len(first), 10)
+                self.assertFalse(first.has_previous())
+                second = self.guest_client.get(
+                    url + '?after=' + first.next_cursor
+                ).context['page_obj']
+                self.assertEqual(len(second), 3)
+                self.assertFalse(second.has_next())
+                back = self.guest_client.get(
+                    url + '?before=' + second.previous_cursor
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_keyset_broken_cursor_shows_first_page(self):
+        """Испорченный курсор отдаёт первую страницу"""
+        response = self.guest_client.get(
+            reverse('posts:index') + '?after=broken')
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 10)
+        self.assertFalse(page.has_previous())
+
+    def test_keyset_cursor_of_wrong_types_shows_first_page(self):
+        """Курсор с чужими типами значений отдаёт первую страницу"""
+        Follow.objects.create(user=self.user_author, author=self.user)
+        client = Client()
+        client.force_login(self.user_author)
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:follow_index'),
+        ]
+        cursors = [[1, 1], [{}, 1], ['2020-01-01T00:00:00', 10 ** 20]]
+        for url in urls:
+            for values in cursors:
+                with self.subTest(url=url, cursor=values):
+                    response = client.get(
+                        url, {'after': encode_cursor(values)})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertFalse(
+                        response.context['page_obj'].has_previous())
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='cached_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Закэшированный пост',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        # Откат транзакции теста не откатывает версии в кэше
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def test_edit_changes_cached_card(self):
+        """После post_edit лента показывает новую версию карточки"""
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')), self.post.text)
+        self.author_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            data={'text': 'Обновлённый пост', 'group': self.group.pk},
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Обновлённый пост')
+        self.assertNotContains(response, self.post.text)
+
+    def test_author_and_group_changes_reach_cached_card(self):
+        """Смена имени автора и удаление группы обновляют карточки"""
+        group = Group.objects.create(
+            title='Удаляемая группа',
+            slug='removed_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=self.user, text='Пост', group=group)
+        group_url = reverse('posts:group', kwargs={'slug': group.slug})
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')), group_url)
+        self.user.first_name = 'Лев'
+        self.user.last_name = 'Толстой'
+        self.user.save()
+        group.delete()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Лев Толстой')
+        self.assertNotContains(response, group_url)
+
+    def test_only_name_change_bumps_versions(self):
+        """Смена пароля и почты не трогает посты, смена имени — трогает"""
+        user = User.objects.get(pk=self.user.pk)
+        version = self.post.version
+        user.set_password('new-password')
+        user.email = 'auth@example.com'
+        user.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, version)
+        user.first_name = 'Лев'
+        user.save()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, version + 1)
+
+
+@override_settings(JOBS_EAGER=True)
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Летом мы ездили на море, море было тёплым',
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text='Зимой на море холодно <b>очень</b>',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, after=None):
+        params = {'q': query}
+        if after:
+            params['after'] = after
+        response = self.guest_client.get(reverse('posts:search'), params)
+        return response.context['page_obj']
+
+    def test_search_ranks_and_highlights(self):
+        """Поиск ранжирует совпадения и подсвечивает слова"""
+        page = self.search('МОРЕ')
+        self.assertEqual(list(page), [self.post, self.other_post])
+        self.assertIn('<mark>море</mark>', page[0].snippet)
+        self.assertIn('&lt;b&gt;', page[1].snippet)
+        self.assertEqual(list(self.search('зимой "холодно')),
+                         [self.other_post])
+
+    def test_search_index_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении поста"""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Осенью шли дожди'
+        post.save()
+        self.assertEqual(list(self.search('летом')), [])
+        self.assertEqual(list(self.search('дожди')), [post])
+        Post.objects.get(pk=self.other_post.pk).delete()
+        self.assertEqual(list(self.search('море')), [])
+
+    def test_search_keyset_pages(self):
+        """Результаты поиска листаются курсором"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Поиск страница {i}')
+            for i in range(12)
+        )
+        call_command('rebuild_search_index', stdout=StringIO())
+        first = self.search('страница')
+        self.assertEqual(len(first), 10)
+        second = self.search('страница', first.next_cursor)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        self.assertFalse(set(first) & set(second))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_unchanged_pages_return_304(self):
+        """Повторный запрос без изменений получает 304"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_304_skips_page_query(self):
+        """304 отдаётся одним запросом к базе, без ленты и шаблона"""
+        etag = self.guest_client.get(reverse('posts:index'))['ETag']
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                reverse('posts:index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_and_viewer_invalidate_etag(self):
+        """Правка поста и другой пользователь меняют ETag"""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.urls}
+        for url in self.urls:
+            with self.subTest(url=url, viewer='author'):
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Поправленный пост'
+        post.save()
+        for url in self.urls:
+            with self.subTest(url=url, viewer='guest'):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, 200)
+
+    def test_only_author_rename_invalidates_etag(self):
+        """Регистрация и смена пароля не меняют ETag, смена имени — да"""
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        User.objects.create_user(username='newcomer')
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        user.last_name = 'Толстой'
+        user.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(JOBS_EAGER=True)
+class FollowViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.author = User.objects.create_user(username='writer')
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Старый пост автора')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.user)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(self.stranger)
+
+    def follow_feed(self, client):
+        response = client.get(reverse('posts:follow_index'))
+        return [entry.post for entry in response.context['page_obj']]
+
+    def follow(self, client, author, action='profile_follow'):
+        return client.post(
+            reverse(f'posts:{action}', kwargs={'username': author}))
+
+    def test_follow_and_unfollow(self):
+        """Подписка добавляет посты автора в ленту, отписка убирает"""
+        self.follow(self.reader_client, self.author)
+        self.assertTrue(Follow.objects.filter(
+            user=self.user, author=self.author).exists())
+        self.assertEqual(self.follow_feed(self.reader_client),
+                         [self.old_post])
+        self.follow(self.reader_client, self.author, 'profile_unfollow')
+        self.assertFalse(Follow.objects.filter(
+            user=self.user, author=self.author).exists())
+        self.assertEqual(self.follow_feed(self.reader_client), [])
+
+    def test_new_post_reaches_followers_only(self):
+        """Новый пост попадает только в ленты подписчиков"""
+        self.follow(self.reader_client, self.author)
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(
+            reverse('posts:post_create'), data={'text': 'Свежий пост'})
+        new_post = Post.objects.get(text='Свежий пост')
+        self.assertEqual(self.follow_feed(self.reader_client),
+                         [new_post, self.old_post])
+        self.assertEqual(self.follow_feed(self.stranger_client), [])
+
+    def test_cannot_follow_self_or_by_get(self):
+        """Нельзя подписаться на себя или GET-запросом"""
+        self.follow(self.reader_client, self.user)
+        response = self.reader_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author}))
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='budget_author')
+        cls.reader = User.objects.create_user(username='budget_reader')
+        cls.group = Group.objects.create(
+            title='Бюджетная группа',
+            slug='budget_slug',
+            description='Тестовое описание',
+        )
+        for number in range(12):
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group)
+        cls.post = Post.objects.filter(author=cls.author).first()
+        Follow.objects.create(user=cls.author, author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_posts_views_within_query_budget(self):
+        """Страницы posts укладываются в бюджет SQL-запросов"""
+        kwargs = {
+            'slug': self.group.slug,
+            'username': self.reader.username,
+            'post_id': self.post.pk,
+        }
+        for pattern in posts_urls.urlpatterns:
+            name = f'{posts_urls.app_name}:{pattern.name}'
+            url = reverse(name, kwargs={
+                key: kwargs[key] for key in pattern.pattern.converters
+            })
+            method = 'post' if name.endswith('follow') else 'get'
+            with self.subTest(url=url):
+                response = self.assertWithinQueryBudget(
+                    self.author_client, url + '?q=Пост', method)
+                self.assertLess(response.status_code, 400)
@@ -0,0 +1,43 @@
+"""Миниатюры картинок постов для карточек и страницы поста.
+
+Миниатюры создаёт задача make_thumbnails после сохранения поста и
+записывает их имена и размеры в Post.thumbnails. Шаблоны берут их из
+уже загруженного поста: страница не ходит ни в KVStore sorl, ни к
+исходникам, сколько бы карточек на ней ни было.
+"""
+import json
+from collections import namedtuple
+
+from django.conf import settings
+from sorl.thumbnail import default, get_thumbnail
+
+Thumbnail = namedtuple('Thumbnail', 'url width height')
+
+
+def generate(image):
+    """Создаёт миниатюры всех размеров и возвращает их для Post.thumbnails.
+
+    Вместе с ними запоминается имя исходника: после замены картинки
+    старые миниатюры не показываются, пока задача не сделает новые.
+    """
+    prepared = {'source': image.name}
+    for size, (geometry, options) in settings.POST_THUMBNAILS.items():
+        thumbnail = get_thumbnail(image, geometry, **options)
+        prepared[size] = [thumbnail.name, thumbnail.width, thumbnail.height]
+    return json.dumps(prepared)
+
+
+def find(post, size):
+    """Готовая миниатюра размера size из POST_THUMBNAILS или None."""
+    if not post.image or not post.thumbnails:
+        return None
+    try:
+        prepared = json.loads(post.thumbnails)
+    except ValueError:
+        return None
+    if not isinstance(prepared, dict) or size not in prepared:
+        return None
+    if prepared.get('source') != post.image.name:
+        return None
+    name, width, height = prepared[size]
+    return Thumbnail(default.storage.url(name), width, height)
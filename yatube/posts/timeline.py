@@ -0,0 +1,46 @@
+from django.conf import settings
+
+from core.writes import write
+
+from .models import Follow, Post, TimelineEntry
+
+
+def _insert(user_post_pairs):
+    """Пишет записи ленты пачками, каждая пачка — своя транзакция."""
+    batch = []
+    for user_id, post_id, pub_date in user_post_pairs:
+        batch.append(
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        )
+        if len(batch) == settings.TIMELINE_BATCH_SIZE:
+            _flush(batch)
+            batch = []
+    if batch:
+        _flush(batch)
+
+
+def _flush(batch):
+    write(TimelineEntry.objects.bulk_create, batch, ignore_conflicts=True)
+
+
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).values(
+        'author_id', 'pub_date').first()
+    if post is None:
+        return
+    followers = Follow.objects.filter(author_id=post['author_id']).values_list(
+        'user_id', flat=True).iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    _insert(
+        (user_id, post_id, post['pub_date']) for user_id in followers
+    )
+
+
+def backfill(user_id, author_id):
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'pub_date').iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    _insert((user_id, post_id, pub_date) for post_id, pub_date in posts)
+
+
+def drop(user_id, author_id):
+    write(TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete)
@@ -0,0 +1,171 @@
+"""Форматы импорта и экспорта постов: CSV и JSONL, можно в gzip.
+
+Строка поста — text, pub_date (ISO 8601), author (username) и group
+(slug, может быть пустым). При импорте необязательные group_title и
+group_description задают название и описание новой группы.
+"""
+import csv
+import gzip
+import io
+import json
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .counters import rebuild_counters
+from .freshness import SITE_SCOPE, touch
+from .models import Follow, Post
+from .search import rebuild_index
+from .timeline import backfill
+
+COLUMNS = ('text', 'pub_date', 'author', 'group')
+FORMATS = ('csv', 'jsonl')
+EXPORT_CHUNK_SIZE = 2000
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    for fmt in FORMATS:
+        if name.endswith(f'.{fmt}'):
+            return fmt
+    raise ValueError(f'Не удалось определить формат {path}, укажите --format')
+
+
+def open_text(path, mode):
+    """Открывает файл как текст UTF-8, .gz — через gzip."""
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8', newline='')
+    return io.open(path, mode, encoding='utf-8', newline='')
+
+
+def read_rows(stream, fmt):
+    """Потоком отдаёт строки источника как словари.
+
+    Вместо битой строки JSONL отдаётся None: она пропускается, но сохраняет
+    нумерацию строк, по которой импорт продолжает работу после обрыва.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def parse_pub_date(value):
+    if not value:
+        return timezone.now()
+    pub_date = parse_datetime(value)
+    if pub_date is None:
+        raise ValueError(f'Некорректная дата: {value}')
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def parse_bound(value):
+    """Граница периода: дата (полночь) или дата и время."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Некорректная дата: {value}')
+        moment = datetime.combine(day, time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add у Post.pub_date на время импорта.
+
+    Иначе bulk_create перезапишет даты из источника текущим временем.
+    """
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def after_import(last_post_id):
+    """Делает за bulk_create то, что при save() делают сигналы постов."""
+    rebuild_counters()
+    rebuild_index()
+    follows = Follow.objects.filter(
+        author__posts__id__gt=last_post_id
+    ).values_list('user_id', 'author_id').distinct()
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
+    touch(SITE_SCOPE)
+
+
+def export_rows(posts=None, since=None, until=None,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки постов по возрастанию id, без загрузки всей таблицы.
+
+    iterator() читает базу порциями по chunk_size, поэтому память не
+    зависит от числа постов.
+    """
+    if posts is None:
+        posts = Post.objects.all()
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    if until is not None:
+        posts = posts.filter(pub_date__lt=until)
+    return posts.order_by('id').values_list(
+        'text', 'pub_date', 'author__username', 'group__slug'
+    ).iterator(chunk_size=chunk_size)
+
+
+def serialize_rows(rows, fmt):
+    """Отдаёт экспорт построчно; для CSV первой строкой идёт заголовок."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def take():
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        writer.writerow(COLUMNS)
+        yield take()
+        for text, pub_date, author, group in rows:
+            writer.writerow((text, pub_date.isoformat(), author, group or ''))
+            yield take()
+        return
+    for text, pub_date, author, group in rows:
+        yield json.dumps({
+            'text': text,
+            'pub_date': pub_date.isoformat(),
+            'author': author,
+            'group': group,
+        }, ensure_ascii=False) + '\n'
+
+
+def gzip_chunks(lines, size=64 * 1024):
+    """Сжимает поток строк в gzip, отдавая куски примерно по size байт."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    pending = []
+    pending_size = 0
+    for line in lines:
+        data = line.encode()
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= size:
+            chunk = compressor.compress(b''.join(pending))
+            pending, pending_size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
@@ -0,0 +1,76 @@
+"""Рейтинг «популярное сейчас» для сайта и каждой группы.
+
+Оценка поста — (подписчики автора + 1) / (часы с публикации + 2) **
+TRENDING_GRAVITY: свежие посты популярных авторов наверху, со временем
+любой пост опускается. Считается периодически по постам последних
+TRENDING_HOURS часов; страницы читают готовую таблицу TrendingPost.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from core.writes import with_retry
+
+from .freshness import touch
+from .models import Follow, Post, TrendingPost
+
+
+def score(followers, pub_date, now):
+    hours = max((now - pub_date).total_seconds() / 3600, 0)
+    return (followers + 1) / (hours + 2) ** settings.TRENDING_GRAVITY
+
+
+def _keep(heap, item, size):
+    if len(heap) < size:
+        heapq.heappush(heap, item)
+    else:
+        heapq.heappushpop(heap, item)
+
+
+def _replace(rows):
+    TrendingPost.objects.all().delete()
+    TrendingPost.objects.bulk_create(rows, batch_size=500)
+
+
+def compute(now=None):
+    """Пересчитывает рейтинги; возвращает число групп с рейтингом."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.TRENDING_HOURS)
+    followers = dict(
+        Follow.objects.order_by().values_list('author').annotate(
+            total=Count('pk'))
+    )
+    candidates = Post.objects.filter(pub_date__gte=since).values_list(
+        'pk', 'author_id', 'group_id', 'pub_date').iterator(chunk_size=2000)
+    size = settings.TRENDING_POSTS
+    site = []
+    groups = defaultdict(list)
+    # Кучи по size лучших: память не зависит от числа постов за окно.
+    for post_id, author_id, group_id, pub_date in candidates:
+        item = (score(followers.get(author_id, 0), pub_date, now), post_id)
+        _keep(site, item, size)
+        if group_id is not None:
+            _keep(groups[group_id], item, size)
+    rows = [
+        TrendingPost(group_id=group_id, post_id=post_id, rank=rank,
+                     score=value)
+        for group_id, heap in [(None, site), *groups.items()]
+        for rank, (value, post_id) in enumerate(
+            sorted(heap, reverse=True), start=1)
+    ]
+    with_retry(_replace, rows)
+    touch('trending')
+    return len(groups)
+
+
+def ranking(group=None, limit=None):
+    """Посты рейтинга сайта или группы по местам, одним запросом."""
+    entries = TrendingPost.objects.filter(group=group).select_related(
+        'post__author', 'post__group')
+    if limit is not None:
+        entries = entries[:limit]
+    return [entry.post for entry in entries]
@@ -1,13 +1,50 @@
 from django.urls import path
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('group/', views.groups, name='groups'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
+    path(
+        'group/<slug:slug>/popular/',
+        views.popular,
+        name='group_popular'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('search/', views.search, name='search'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'
+    ),
+    path('feed/rss/', feeds.site_rss, name='feed'),
+    path('feed/atom/', feeds.site_atom, name='feed_atom'),
+    path('group/<slug:slug>/feed/rss/', feeds.group_rss, name='group_feed'),
+    path(
+        'group/<slug:slug>/feed/atom/',
+        feeds.group_atom,
+        name='group_feed_atom'
+    ),
+    path(
+        'profile/<str:username>/feed/rss/',
+        feeds.author_rss,
+        name='profile_feed'
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.author_atom,
+        name='profile_feed_atom'
+    ),
 ]
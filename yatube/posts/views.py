@@ -1,56 +1,140 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
-from yatube.settings import COUNT_POSTS
-
+from django.views.decorators.http import require_POST
+from yatube.settings import (
+    COUNT_POSTS, GROUPS_PER_PAGE, PAGINATION_MODE, TRENDING_SIDEBAR
+)
+
+from core import writes
+from core.paginators import ApproximatePaginator, KeysetPaginator
+from core.routers import read_from_replica
+from jobs.queue import enqueue
 from posts.forms import PostForm
 
-from .models import Group, Post, User
-
-
+from . import freshness, tasks, trending
+from .models import Follow, Group, GroupStats, Post, TimelineEntry, User
+from .search import search_posts
+
+# Порядки каталога групп: все по полям сводки, Post не читается.
+GROUP_ORDERINGS = {
+    'activity': ('-week_posts', '-last_post', 'group_id'),
+    'recent': ('-last_post', 'group_id'),
+    'posts': ('-group__posts_count', 'group_id'),
+    'title': ('group__title', 'group_id'),
+}
+GROUP_SORTS = (
+    ('activity', 'Активные'),
+    ('recent', 'Свежие'),
+    ('posts', 'Крупные'),
+    ('title', 'По названию'),
+)
+
+
+@read_from_replica
+@freshness.conditional_page(freshness.index_scope)
 def index(request):
     posts = Post.objects.select_related('author', 'group')
     context = {
-        'page_obj': page_navigator(request, posts),
+        'page_obj': page_navigator(
+            request, posts, cache_key='posts:index:count'
+        ),
+        'popular': trending.ranking(limit=TRENDING_SIDEBAR),
     }
     return render(request, 'posts/index.html', context)
 
 
+@read_from_replica
+@freshness.conditional_page(freshness.popular_scope)
+def popular(request, slug=None):
+    group = get_object_or_404(Group, slug=slug) if slug else None
+    context = {
+        'group': group,
+        'posts': trending.ranking(group),
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+@read_from_replica
+@freshness.conditional_page(freshness.groups_scope)
+def groups(request):
+    sort = request.GET.get('sort')
+    if sort not in GROUP_ORDERINGS:
+        sort = 'activity'
+    stats = GroupStats.objects.select_related('group').order_by(
+        *GROUP_ORDERINGS[sort])
+    context = {
+        'sort': sort,
+        'sorts': GROUP_SORTS,
+        'page_obj': ApproximatePaginator(
+            stats, GROUPS_PER_PAGE, cache_key='posts:groups:count'
+        ).get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@read_from_replica
+@freshness.conditional_page(freshness.group_scope)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
     context = {
         'group': group,
-        'page_obj': page_navigator(request, posts),
+        'page_obj': page_navigator(request, posts, group.posts_count),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@read_from_replica
+@freshness.conditional_page(freshness.profile_scope)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     posts = author.posts.select_related('group')
+    stats = getattr(author, 'stats', None)
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author
+    ).exists()
     context = {
         'author': author,
-        'page_obj': page_navigator(request, posts),
+        'following': following,
+        'page_obj': page_navigator(
+            request, posts, stats.posts_count if stats else 0
+        ),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@read_from_replica
+@freshness.conditional_page(freshness.post_scope)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     context = {
         'post': post,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'page_obj': search_posts(
+            query, COUNT_POSTS, request.GET.get('after')
+        ) if query else None,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        writes.write(post.save)
         return redirect('posts:profile', post.author)
     form = PostForm()
     context = {
@@ -62,11 +146,15 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
-    if request.user != post.author:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post.pk)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        instance=post
+    )
     if form.is_valid():
-        form.save()
+        writes.write(form.save)
         return redirect('posts:post_detail', post.pk)
     context = {
         'form': form,
@@ -76,6 +164,59 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
-def page_navigator(request, posts):
-    return Paginator(
-        posts, COUNT_POSTS).get_page(request.GET.get('page'))
+@login_required
+def follow_index(request):
+    entries = TimelineEntry.objects.filter(
+        user=request.user
+    ).select_related('post__author', 'post__group')
+    context = {
+        'page_obj': KeysetPaginator(entries, COUNT_POSTS).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        ),
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        _, created = writes.write(
+            Follow.objects.get_or_create, user=request.user, author=author
+        )
+        if created:
+            enqueue(tasks.sync_follow, request.user.pk, author.pk,
+                    key=f'sync_follow:{request.user.pk}:{author.pk}')
+            freshness.touch(f'author:{author.pk}')
+    return redirect('posts:profile', username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    deleted, _ = writes.write(
+        Follow.objects.filter(user=request.user, author=author).delete
+    )
+    if deleted:
+        enqueue(tasks.sync_follow, request.user.pk, author.pk,
+                key=f'sync_follow:{request.user.pk}:{author.pk}')
+        freshness.touch(f'author:{author.pk}')
+    return redirect('posts:profile', username)
+
+
+def page_navigator(request, posts, count=None, cache_key=None):
+    if (
+        PAGINATION_MODE == 'keyset'
+        or 'after' in request.GET
+        or 'before' in request.GET
+    ):
+        return KeysetPaginator(posts, COUNT_POSTS).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    return ApproximatePaginator(
+        posts, COUNT_POSTS, count, cache_key
+    ).get_page(request.GET.get('page'))
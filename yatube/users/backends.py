@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_KEY = 'auth:user:{}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Запись сбрасывается при каждом сохранении пользователя, поэтому смена
+    и сброс пароля сразу разлогинивают остальные сессии. Как и отметки
+    свежести, это работает между процессами только с общим кэшем.
+    """
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_SECONDS)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+
+PASSWORD = 'Old-pa55word'
+
+
+class CachedSessionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', password=PASSWORD)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username='auth', password=PASSWORD)
+
+    def test_no_session_or_user_queries(self):
+        """Страница вошедшего пользователя не читает сессию и пользователя
+        из базы"""
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('FROM "django_session"', sql)
+        self.assertNotIn('FROM "auth_user"', sql)
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Смена пароля сбрасывает пользователя в кэше: другие сессии
+        выходят, текущая остаётся"""
+        other = Client()
+        other.login(username='auth', password=PASSWORD)
+        url = reverse('posts:follow_index')
+        other.get(url)
+        self.client.post(reverse('users:password_change'), {
+            'old_password': PASSWORD,
+            'new_password1': 'New-pa55word',
+            'new_password2': 'New-pa55word',
+        })
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertRedirects(
+            other.get(url), f'{reverse("users:login")}?next={url}')
@@ -21,15 +21,22 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'posts',
     'users',
     'core',
-    'about'
+    'about',
+    'api',
+    'jobs',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.query_budget.QueryBudgetMiddleware',
+    'core.middleware.replica.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,10 +73,71 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+    # Копия default для чтения лент, обновляется командой sync_replica.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# Применяются к каждому соединению SQLite (core.sqlite). WAL пускает
+# читателей параллельно с писателем, synchronous = NORMAL в WAL не теряет
+# целостность, только последние транзакции при отключении питания.
+# mmap_size и cache_size (в КиБ, если отрицательный) — в байтах памяти на
+# соединение, busy_timeout — сколько миллисекунд ждать чужую блокировку.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+# Реплика не пишется и не переводится в WAL, см. sync_replica.
+DATABASES['replica']['PRAGMAS'] = {
+    'query_only': 'on',
+    'mmap_size': SQLITE_PRAGMAS['mmap_size'],
+    'cache_size': SQLITE_PRAGMAS['cache_size'],
+    'busy_timeout': SQLITE_PRAGMAS['busy_timeout'],
+}
+
+# index, group_posts, profile и post_detail читают из случайной реплики
+# (core.routers.read_from_replica), записи и сессии идут в default. После
+# изменяющего запроса пользователь REPLICA_PIN_SECONDS читает из default,
+# чтобы видеть свои посты. Включается переменной окружения YATUBE_REPLICAS.
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = (
+    ['replica'] if os.environ.get('YATUBE_REPLICAS') else []
+)
+REPLICA_PIN_SECONDS = 10
+
+# В кэше лежат карточки постов, отметки свежести, сессии, пользователи,
+# оценки числа постов и готовые фиды. С 300 записями по умолчанию он
+# постоянно чистился бы, выбрасывая и бессрочные отметки свежести, а без
+# них не работают 304. LocMemCache годится для одного процесса: при
+# нескольких воркерах нужен общий кэш (memcached, redis) — на нём держатся
+# posts.freshness.touch и users.backends.CachedModelBackend.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
     }
 }
 
 
+# Сессии читаются из кэша, а пишутся и в кэш, и в базу: страница
+# вошедшего пользователя не ходит в django_session. 'signed_cookies'
+# убрал бы и запись в базу, но такую сессию нельзя отозвать на сервере.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Пользователь сессии тоже берётся из кэша (см. users.backends), запись
+# живёт не дольше USER_CACHE_SECONDS.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_SECONDS = 5 * 60
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -99,8 +167,117 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic кладёт сюда файлы с хэшем в имени и их копии в gzip и
+# brotli; WhiteNoise отдаёт их с Cache-Control: immutable на 10 лет.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.StaticStorage'
+
+# Загрузки лежат под именами из SHA-256 содержимого, миниатюры sorl — под
+# именами из имени исходника и параметров, поэтому отдаются с immutable.
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# Размеры миниатюр картинок постов: геометрия sorl и параметры. Их готовит
+# задача make_thumbnails, шаблоны только берут готовые.
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+    'detail': ('1280', {'upscale': False}),
+}
 
 COUNT_POSTS: int = 10
+# 'pages' — номера страниц, 'keyset' — курсоры ?after=/?before=
+PAGINATION_MODE = 'pages'
+PAGINATOR_COUNT_TTL = 60
+PAGINATOR_WINDOW = 3
+API_MAX_LIMIT = 1000
+
+# Сколько SQL-запросов (и миллисекунд SQL) может сделать view. При DEBUG
+# лишние запросы бросают QueryBudgetExceeded, иначе пишутся в лог
+# yatube.query_budget; превышение времени только пишется в лог. Числа — с
+# запасом в пару запросов над замером для авторизованного пользователя:
+# N+1 на странице из COUNT_POSTS постов выходит далеко за них.
+QUERY_BUDGETS = {
+    'posts:index': {'queries': 6, 'ms': 100},
+    'posts:group': {'queries': 8, 'ms': 100},
+    'posts:profile': {'queries': 9, 'ms': 100},
+    'posts:post_detail': {'queries': 6, 'ms': 50},
+    'posts:post_create': {'queries': 19, 'ms': 200},
+    'posts:post_edit': {'queries': 17, 'ms': 200},
+    'posts:search': {'queries': 6, 'ms': 200},
+    'posts:follow_index': {'queries': 5, 'ms': 100},
+    'posts:profile_follow': {'queries': 10, 'ms': 100},
+    'posts:profile_unfollow': {'queries': 7, 'ms': 100},
+    'posts:groups': {'queries': 4, 'ms': 50},
+    'posts:popular': {'queries': 3, 'ms': 50},
+    'posts:group_popular': {'queries': 4, 'ms': 50},
+    'posts:feed': {'queries': 2, 'ms': 50},
+    'posts:feed_atom': {'queries': 2, 'ms': 50},
+    'posts:group_feed': {'queries': 4, 'ms': 50},
+    'posts:group_feed_atom': {'queries': 4, 'ms': 50},
+    'posts:profile_feed': {'queries': 4, 'ms': 50},
+    'posts:profile_feed_atom': {'queries': 4, 'ms': 50},
+    'api:index': {'queries': 1},
+    'api:group': {'queries': 2},
+    'api:profile': {'queries': 2},
+    'api:post_detail': {'queries': 1},
+}
+QUERY_BUDGET_RAISE = DEBUG
+# Заголовок Server-Timing с числом и временем запросов: он раскрывает
+# устройство сайта любому клиенту, поэтому только для разработки.
+QUERY_BUDGET_TIMING_HEADER = DEBUG
+
+TIMELINE_BATCH_SIZE = 500
+
+# В RSS и Atom — FEED_POSTS последних постов. Готовая лента лежит в кэше
+# до изменения области, FEED_CACHE_SECONDS лишь выселяет старые версии.
+FEED_POSTS = 20
+FEED_CACHE_SECONDS = 24 * 60 * 60
+
+# Каталог групп сортируется по сводке GroupStats: активность — число
+# постов за GROUP_ACTIVITY_DAYS дней. Окно сдвигает manage.py
+# roll_group_stats, его нужно запускать раз в сутки (cron).
+GROUP_ACTIVITY_DAYS = 7
+GROUPS_PER_PAGE = 20
+
+# «Популярное сейчас»: TRENDING_POSTS лучших постов сайта и каждой группы
+# из опубликованных за TRENDING_HOURS часов, TRENDING_SIDEBAR из них — на
+# главной. Рейтинг пересчитывает manage.py compute_trending по расписанию.
+TRENDING_POSTS = 10
+TRENDING_SIDEBAR = 5
+TRENDING_HOURS = 72
+TRENDING_GRAVITY = 1.5
+
+# Поиск и ленты подписок обновляются фоновыми задачами jobs. Очередь
+# разбирает manage.py run_jobs; с JOBS_IN_PROCESS — ещё и поток каждого
+# веб-процесса, чтобы хватало одного runserver. JOBS_EAGER выполняет
+# задачи сразу при постановке, без очереди. Упавшая задача повторяется до
+# JOBS_MAX_ATTEMPTS раз с паузой от JOBS_RETRY_DELAY секунд, растущей
+# вдвое; зависшая дольше JOBS_LEASE секунд считается упавшей.
+JOBS_EAGER = False
+JOBS_IN_PROCESS = True
+JOBS_BATCH_SIZE = 20
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_LEASE = 300
+JOBS_POLL_INTERVAL = 5
+JOBS_KEEP_DAYS = 7
+
+# Массовые действия админки над постами идут задачами jobs, по
+# ADMIN_BULK_CHUNK_SIZE постов в транзакции.
+ADMIN_BULK_CHUNK_SIZE = 500
+
+# Записи из posts идут через поток-писатель core.writes: записи, пришедшие
+# за WRITE_BATCH_WINDOW секунд, коммитятся одной транзакцией. Блокировку
+# базы другим процессом переживают WRITE_RETRIES повторов с паузой от
+# WRITE_RETRY_DELAY секунд, растущей вдвое.
+WRITE_QUEUE = True
+WRITE_BATCH_WINDOW = 0.005
+WRITE_BATCH_SIZE = 50
+WRITE_RETRIES = 5
+WRITE_RETRY_DELAY = 0.05
+WRITE_TIMEOUT = 30
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'